@@ -3,17 +3,36 @@ import io
 import os
 import json
 import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response
+import itertools
+import click
+from flask import (Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response,
+                   stream_with_context)
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import mysql.connector
 import traceback
 from mysql.connector import Error
-from ml_model_multiclass import train_model, predict_project, MODEL_PATH
+import ml_service
+import model_registry
+from training_jobs import submit_training_job, get_job, public_job
 
 app = Flask(__name__)
 app.secret_key = 'tu_clave_secreta_aqui'
 
+# Límite de proyectos por llamada a /api/predict_batch
+MAX_BATCH_PREDICTIONS = 1000
+
+# Tamaño máximo de un CSV de entrenamiento subido: se chequea contra el
+# Content-Length antes de leer el cuerpo y se vuelve a validar al leer el archivo
+MAX_TRAINING_UPLOAD_BYTES = int(float(os.environ.get('ML_MAX_TRAINING_UPLOAD_MB', 50)) * 1024 * 1024)
+
+# Snapshot de entrenamiento armado desde `proyectos` (flask build-training-snapshot)
+TRAINING_SNAPSHOT_PATH = os.path.join('data', 'success_training.npz')
+
+# Antigüedad máxima de una fila de `predicciones` antes de recalcularla en vivo
+# (la antigüedad del proyecto es una feature, así que la predicción envejece)
+PREDICTION_MAX_AGE = datetime.timedelta(hours=24)
+
 # Configuración para XAMPP
 db_config = {
     'host': '127.0.0.1',  # Cambiado de 'localhost' a '127.0.0.1'
@@ -67,6 +86,48 @@ def init_db():
                 )
             ''')
 
+            # Predicciones materializadas del modelo de éxito
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS predicciones (
+                    project_id INT PRIMARY KEY,
+                    model_version VARCHAR(64) NOT NULL,
+                    label VARCHAR(50) NOT NULL,
+                    probabilities TEXT NOT NULL,
+                    resultado TEXT NOT NULL,
+                    scored_at DATETIME NOT NULL,
+                    INDEX idx_predicciones_version (model_version)
+                )
+            ''')
+
+            # Resultado observado de cada proyecto (etiqueta para entrenar el modelo)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS proyectos_resultados (
+                    project_id INT PRIMARY KEY,
+                    outcome TINYINT NOT NULL,
+                    recorded_by INT,
+                    recorded_at DATETIME NOT NULL
+                )
+            ''')
+
+            # Proyectos modificados desde su última predicción. changed_at con
+            # microsegundos: el scoring borra la marca solo si no cambió desde
+            # que leyó el proyecto, y con segundos dos ediciones se confundían
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS proyectos_cambios (
+                    project_id INT PRIMARY KEY,
+                    changed_at DATETIME(6) NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                SELECT DATETIME_PRECISION FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'proyectos_cambios'
+                  AND COLUMN_NAME = 'changed_at'
+            ''')
+            row = cursor.fetchone()
+            if row and (row[0] or 0) < 6:
+                # Tablas creadas antes con DATETIME
+                cursor.execute("ALTER TABLE proyectos_cambios MODIFY changed_at DATETIME(6) NOT NULL")
+
             connection.commit()
             print("Database initialized successfully")
             
@@ -96,6 +157,19 @@ def registrar_actividad(usuario_id, accion):
         print(f"Error al registrar actividad: {e}")
 
 
+def marcar_proyecto_modificado(cursor, project_id):
+    """Marca un proyecto para que el scoring incremental lo vuelva a puntuar.
+
+    Llamar en toda escritura de `proyectos` que cambie descripción, progreso o
+    fecha de creación, dentro de la misma transacción.
+    """
+    cursor.execute("""
+        INSERT INTO proyectos_cambios (project_id, changed_at)
+        VALUES (%s, NOW(6))
+        ON DUPLICATE KEY UPDATE changed_at = NOW(6)
+    """, (project_id,))
+
+
 
 
 @app.route('/')
@@ -944,6 +1018,24 @@ def actualizar_progreso_proyecto(project_id):
         if progreso < 0 or progreso > 100:
             return jsonify({'error': 'Progreso inválido'}), 400
 
+        # Guardar el progreso en la base y marcar el proyecto para re-scoring
+        connection = get_db_connection()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                cursor.execute(
+                    "UPDATE proyectos SET progreso = %s WHERE id = %s AND user_id = %s",
+                    (progreso, project_id, session['user_id'])
+                )
+                if cursor.rowcount:
+                    marcar_proyecto_modificado(cursor, project_id)
+                connection.commit()
+                cursor.close()
+            except Error as e:
+                print(f"Error al actualizar progreso en la base: {e}")
+            finally:
+                connection.close()
+
         data = load_user_data(session['user_id'])
 
         # Update project progreso
@@ -1003,9 +1095,8 @@ def api_predict_test():
             'created_at': created_at
         }
         
-        # Usar la función de predicción existente
-        from ml_model_multiclass import predict_project
-        result = predict_project(project_data)
+        # Modelo del sandbox del usuario si ya entrenó uno; si no, el global
+        result = ml_service.predict_project(project_data, model_path=_sandbox_model_path(resolve=True))
         
         return jsonify({'success': True, 'result': result})
         
@@ -1019,6 +1110,22 @@ def api_predict_test():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _sandbox_model_path(resolve=False):
+    """Modelo sandbox del usuario en sesión; con resolve=True cae al global si todavía no entrenó"""
+    scope = f"user-{session['user_id']}"
+    if resolve:
+        return model_registry.resolve_scope(scope)
+    return model_registry.scope_model_path(scope)
+
+
+def _scope_model_path_arg(scope):
+    """Ruta lógica del scope pedido por un administrador (?scope=); None si es inválido"""
+    try:
+        return model_registry.scope_model_path(scope or model_registry.GLOBAL_SCOPE)
+    except ValueError:
+        return None
+
+
 @app.route('/emprendedor/entrenar_modelo', methods=['POST'])
 def emprendedor_entrenar_modelo():
     """Permite al emprendedor entrenar el modelo con su propio CSV"""
@@ -1026,6 +1133,11 @@ def emprendedor_entrenar_modelo():
         return jsonify({'success': False, 'error': 'No autorizado'}), 401
     
     try:
+        # Rechazar por Content-Length antes de tocar request.files: al accederlo
+        # Werkzeug ya lee y guarda todo el cuerpo del upload
+        if request.content_length and request.content_length > MAX_TRAINING_UPLOAD_BYTES:
+            return jsonify({'success': False, 'error': 'El archivo supera el tamaño máximo permitido'}), 413
+        
         # Verificar que se haya subido un archivo
         if 'dataset' not in request.files:
             return jsonify({'success': False, 'error': 'No se proporcionó archivo'}), 400
@@ -1045,18 +1157,20 @@ def emprendedor_entrenar_modelo():
             tmp_path = tmp.name
         
         try:
-            # Entrenar el modelo
-            from ml_model_multiclass import train_model
-            model_path = train_model(tmp_path)
+            # Rechazar datasets inválidos antes de encolar el fit
+            rejected = _rejected_training_dataset(tmp_path)
+            if rejected:
+                return rejected
+            
+            # Encolar el entrenamiento (se ejecuta en un proceso aparte)
+            job = submit_training_job(tmp_path, model_path=_sandbox_model_path(),
+                                      owner_id=session['user_id'],
+                                      description='Dataset personalizado')
             
             # Registrar actividad
-            registrar_actividad(session['user_id'], "Entrenó el modelo ML con dataset personalizado")
+            registrar_actividad(session['user_id'], "Encoló entrenamiento del modelo ML con dataset personalizado")
             
-            return jsonify({
-                'success': True, 
-                'message': 'Modelo entrenado exitosamente',
-                'model_path': model_path
-            })
+            return _training_job_response(job)
         finally:
             # Limpiar archivo temporal
             import os
@@ -1157,7 +1271,10 @@ def fase1():
         proyectos = []
         for emp in emprendedores:
             cursor.execute(
-                "SELECT title, description, progreso, created_at FROM proyectos WHERE user_id = %s ORDER BY created_at DESC",
+                """SELECT p.title, p.description, p.progreso, p.created_at, pr.label AS prediccion
+                   FROM proyectos p
+                   LEFT JOIN predicciones pr ON pr.project_id = p.id
+                   WHERE p.user_id = %s ORDER BY p.created_at DESC""",
                 (emp['id'],)
             )
             emp_proyectos = cursor.fetchall()
@@ -1167,7 +1284,8 @@ def fase1():
                     'title': p.get('title', 'Sin título'),
                     'description': p.get('description', ''),
                     'progreso': p.get('progreso', p.get('progress', 0)),
-                    'created_at': p.get('created_at', '')
+                    'created_at': p.get('created_at', ''),
+                    'prediccion': p.get('prediccion')
                 })
 
         # Normalizar para plantillas (añade también 'progress')
@@ -1238,6 +1356,7 @@ def crear_proyecto_emprendedor():
         VALUES (%s, %s, %s, %s, %s, NOW())
     """
     cursor.execute(query, (user_id, title, desc, category, 0))
+    marcar_proyecto_modificado(cursor, cursor.lastrowid)
     db.commit()
 
     flash('¡Proyecto creado exitosamente!', 'success')
@@ -1392,10 +1511,11 @@ def panel_mentor():
         
         # Obtener proyectos de los emprendedores asignados
         cursor.execute("""
-            SELECT p.*, u.username as emprendedor_nombre
+            SELECT p.*, u.username as emprendedor_nombre, pr.label as prediccion
             FROM proyectos p
             JOIN users u ON p.user_id = u.id
             JOIN mentor_emprendedor me ON u.id = me.emprendedor_id
+            LEFT JOIN predicciones pr ON pr.project_id = p.id
             WHERE me.mentor_id = %s AND me.estado = 'activo'
             ORDER BY p.created_at DESC
             LIMIT 10
@@ -2227,6 +2347,138 @@ def loaddata_command():
         print("Error de conexión a la base de datos")
 
 
+# Dataset de entrenamiento desde la base
+@app.cli.command('build-training-snapshot')
+@click.argument('output', default=TRAINING_SNAPSHOT_PATH)
+@click.option('--chunk-size', default=5000, show_default=True, help='Filas leídas por bloque')
+def build_training_snapshot_command(output, chunk_size):
+    """Arma el snapshot de entrenamiento (.npz) con los proyectos que tienen resultado registrado."""
+    if not output.endswith('.npz'):
+        raise click.ClickException('El snapshot debe tener extensión .npz')
+    connection = get_db_connection()
+    if not connection:
+        raise click.ClickException('Error de conexión a la base de datos')
+
+    # Cursor sin buffer: las filas se leen del servidor por bloques
+    cursor = connection.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute("""
+            SELECT p.id AS project_id, p.description, p.progreso AS progress, p.created_at, r.outcome
+            FROM proyectos p
+            JOIN proyectos_resultados r ON r.project_id = p.id
+            ORDER BY p.id
+        """)
+
+        def chunks():
+            total = 0
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                total += len(rows)
+                click.echo(f'  {total} proyectos leídos')
+                yield rows
+
+        info = ml_service.write_training_snapshot(chunks(), output)
+    finally:
+        cursor.close()
+        connection.close()
+
+    counts = ', '.join(f'{name}: {n}' for name, n in info['class_counts'].items())
+    click.echo(f"Snapshot {output}: {info['rows']} proyectos ({counts}), {info['bytes'] / 1024:.0f} KB")
+
+
+@app.route('/api/proyectos/<int:project_id>/resultado', methods=['POST'])
+def api_registrar_resultado(project_id):
+    """Registra el resultado observado de un proyecto (etiqueta para entrenar el modelo)"""
+    if 'user_id' not in session or session.get('rol') not in ('Coordinador', 'Administrador'):
+        return jsonify({'success': False, 'error': 'No autorizado'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    outcome = ml_service.outcome_index(data.get('outcome', ''))
+    if outcome is None:
+        return jsonify({'success': False, 'error': 'Resultado inválido (Bajo/Medio/Alto éxito o 0/1/2)'}), 400
+    
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'success': False, 'error': 'Error de conexión a la base de datos'}), 500
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT id FROM proyectos WHERE id = %s", (project_id,))
+        if cursor.fetchone() is None:
+            return jsonify({'success': False, 'error': 'Proyecto no encontrado'}), 404
+        cursor.execute("""
+            INSERT INTO proyectos_resultados (project_id, outcome, recorded_by, recorded_at)
+            VALUES (%s, %s, %s, NOW())
+            ON DUPLICATE KEY UPDATE outcome = VALUES(outcome), recorded_by = VALUES(recorded_by),
+                                    recorded_at = VALUES(recorded_at)
+        """, (project_id, outcome, session['user_id']))
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+    
+    registrar_actividad(session['user_id'], f"Registró el resultado del proyecto {project_id}")
+    return jsonify({'success': True, 'project_id': project_id, 'outcome': outcome})
+
+
+# Versiones del modelo de éxito
+@app.cli.command('model-versions')
+@click.option('--scope', default=model_registry.GLOBAL_SCOPE, help="global, cohort-<id> o user-<id>")
+def model_versions_command(scope):
+    """Lista las versiones del modelo registradas."""
+    registry_dir = model_registry.registry_dir_for(model_registry.scope_model_path(scope))
+    for info in model_registry.list_versions(registry_dir):
+        marker = '*' if info.get('current') else ' '
+        click.echo(f"{marker} {info['version']}  {info.get('trained_date', '')}  "
+                   f"score={info.get('train_score', '-')}")
+
+
+@app.cli.command('model-rollback')
+@click.argument('version', required=False)
+@click.option('--scope', default=model_registry.GLOBAL_SCOPE, help="global, cohort-<id> o user-<id>")
+def model_rollback_command(version, scope):
+    """Vuelve a una versión anterior del modelo sin reentrenar."""
+    try:
+        registry_dir = model_registry.registry_dir_for(model_registry.scope_model_path(scope))
+        version = model_registry.rollback(version, registry_dir)
+        click.echo(f'Modelo actual: {version}')
+    except ValueError as e:
+        click.echo(f'Error: {e}')
+
+
+@app.route('/admin/model/versions', methods=['GET'])
+def admin_model_versions():
+    """Lista las versiones del modelo (solo administradores)"""
+    if 'user_id' not in session or session.get('rol') != 'Administrador':
+        return jsonify({'success': False, 'error': 'No autorizado. Solo administradores.'}), 403
+    
+    model_path = _scope_model_path_arg(request.args.get('scope'))
+    if model_path is None:
+        return jsonify({'success': False, 'error': 'Scope inválido'}), 400
+    registry_dir = model_registry.registry_dir_for(model_path)
+    return jsonify({'success': True, 'versions': model_registry.list_versions(registry_dir)})
+
+
+@app.route('/admin/model/rollback', methods=['POST'])
+def admin_model_rollback():
+    """Restaura una versión previa del modelo (solo administradores)"""
+    if 'user_id' not in session or session.get('rol') != 'Administrador':
+        return jsonify({'success': False, 'error': 'No autorizado. Solo administradores.'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    model_path = _scope_model_path_arg(data.get('scope'))
+    if model_path is None:
+        return jsonify({'success': False, 'error': 'Scope inválido'}), 400
+    try:
+        version = model_registry.rollback(data.get('version'), model_registry.registry_dir_for(model_path))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    registrar_actividad(session['user_id'], f"Restauró la versión {version} del modelo ML")
+    return jsonify({'success': True, 'current_version': version})
+
+
 # Ruta para entrenar (usar en desarrollo; proteger en producción)
 @app.route('/train_success_model', methods=['POST'])
 def route_train_success_model():
@@ -2235,22 +2487,111 @@ def route_train_success_model():
     Solo accesible por administradores.
     Espera que exista el archivo data/success_training.csv
     con una columna 'outcome' (0/1/2 o etiquetas).
+    Con ?source=snapshot usa data/success_training.npz, armado desde la
+    base con `flask build-training-snapshot`.
     """
     # Protección de acceso
     if 'user_id' not in session or session.get('rol') != 'Administrador':
         return jsonify({'success': False, 'error': 'No autorizado. Solo administradores.'}), 403
 
-    csv_path = os.path.join('data', 'success_training.csv')
+    use_snapshot = request.args.get('source') == 'snapshot'
+    csv_path = TRAINING_SNAPSHOT_PATH if use_snapshot else os.path.join('data', 'success_training.csv')
     if not os.path.exists(csv_path):
-        return jsonify({'success': False, 'error': 'CSV de entrenamiento no encontrado en data/success_training.csv'}), 400
+        return jsonify({'success': False, 'error': f'Dataset de entrenamiento no encontrado en {csv_path}'}), 400
+
+    # ?scope=cohort-<id> entrena el modelo de una cohorte sin tocar el global
+    model_path = _scope_model_path_arg(request.args.get('scope'))
+    if model_path is None:
+        return jsonify({'success': False, 'error': 'Scope inválido'}), 400
+    
+    # ?target_p99_ms=&max_artifact_mb= eligen el perfil más preciso que cumpla
+    target_p99_ms = request.args.get('target_p99_ms', type=float)
+    max_artifact_mb = request.args.get('max_artifact_mb', type=float)
+    max_artifact_bytes = int(max_artifact_mb * 1024 * 1024) if max_artifact_mb else None
+    
+    # El snapshot ya sale validado de la base (outcome como índice de clase)
+    rejected = None if use_snapshot else _rejected_training_dataset(csv_path, limits=False)
+    if rejected:
+        return rejected
 
     try:
-        model_path = train_model(csv_path)
-        return jsonify({'success': True, 'model_path': model_path})
+        # ?mode=streaming entrena por bloques con memoria acotada (CSV grandes);
+        # ?mode=select elige hiperparámetros con validación cruzada antes del fit
+        job = submit_training_job(csv_path, model_path=model_path, owner_id=session['user_id'],
+                                  description=f'Entrenamiento con {csv_path}',
+                                  mode=request.args.get('mode'), target_p99_ms=target_p99_ms,
+                                  max_artifact_bytes=max_artifact_bytes)
+        return _training_job_response(job)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _rejected_training_dataset(csv_path, limits=True):
+    """Valida el CSV antes de encolar el entrenamiento; devuelve la respuesta de error o None"""
+    report = ml_service.validate_training_csv(csv_path, max_bytes=MAX_TRAINING_UPLOAD_BYTES if limits else None,
+                                              limits=limits)
+    if report['valid']:
+        return None
+    return jsonify({
+        'success': False,
+        'error': 'Dataset inválido: ' + '; '.join(report['errors']),
+        'validation': report
+    }), 400
+
+
+def _training_job_response(job):
+    """Respuesta estándar al encolar un entrenamiento"""
+    return jsonify({
+        'success': True,
+        'message': 'Entrenamiento en cola',
+        'job_id': job['id'],
+        'status_url': url_for('api_train_job_status', job_id=job['id']),
+        'job': public_job(job)
+    }), 202
+
+
+@app.route('/api/train_jobs/<job_id>', methods=['GET'])
+def api_train_job_status(job_id):
+    """Estado, tiempos y métricas de un entrenamiento encolado"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'No autorizado'}), 401
+    
+    job = get_job(job_id)
+    if not job or (session.get('rol') != 'Administrador' and job.get('owner_id') != session['user_id']):
+        return jsonify({'success': False, 'error': 'Job no encontrado'}), 404
+    
+    return jsonify({'success': True, 'job': public_job(job)})
+
+
+def _project_model_input(project):
+    """Convierte una fila de `proyectos` al diccionario que espera el modelo"""
+    created_at = project['created_at']
+    return {
+        'description': project['description'] or '',
+        'progress': project['progreso'] or 0,
+        'created_at': created_at.isoformat() if hasattr(created_at, 'isoformat') else (created_at or '')
+    }
+
+
+def _save_predictions(cursor, model_version, scored):
+    """Inserta o actualiza filas de `predicciones` para [(project_id, resultado), ...]"""
+    cursor.executemany("""
+        INSERT INTO predicciones (project_id, model_version, label, probabilities, resultado, scored_at)
+        VALUES (%s, %s, %s, %s, %s, NOW())
+        ON DUPLICATE KEY UPDATE
+            model_version = VALUES(model_version),
+            label = VALUES(label),
+            probabilities = VALUES(probabilities),
+            resultado = VALUES(resultado),
+            scored_at = VALUES(scored_at)
+    """, [
+        (project_id, model_version, result['label'],
+         json.dumps(result['probabilities'], ensure_ascii=False),
+         json.dumps(result, ensure_ascii=False))
+        for project_id, result in scored
+    ])
+
+
 # --- ENDPOINT DE PREDICCIÓN DE ÉXITO ---
 @app.route('/predict_success/<int:project_id>', methods=['GET'])
 def predict_success(project_id):
@@ -2261,36 +2602,177 @@ def predict_success(project_id):
         connection = get_db_connection()
         cursor = connection.cursor(dictionary=True)
         
-        # Buscar el proyecto por ID y usuario
+        # Buscar el proyecto por ID y usuario, junto con su predicción materializada
         cursor.execute("""
-            SELECT id, title, description, progreso, created_at
-            FROM proyectos
-            WHERE id = %s AND user_id = %s
+            SELECT p.id, p.title, p.description, p.progreso, p.created_at,
+                   pr.model_version, pr.resultado, pr.scored_at,
+                   c.changed_at
+            FROM proyectos p
+            LEFT JOIN predicciones pr ON pr.project_id = p.id
+            LEFT JOIN proyectos_cambios c ON c.project_id = p.id
+            WHERE p.id = %s AND p.user_id = %s
         """, (project_id, session['user_id']))
         project = cursor.fetchone()
-        connection.close()
 
         if not project:
+            connection.close()
             return jsonify({'success': False, 'error': 'Proyecto no encontrado'}), 404
 
-        # Crear diccionario compatible con el modelo
-        project_data = {
-            'description': project['description'] or '',
-            'progress': project['progreso'] or 0,
-            'created_at': project['created_at'].isoformat() if project['created_at'] else ''
-        }
+        model_version = ml_service.current_model_version()
 
-        # Importar función predict_project del modelo
-        from ml_model_multiclass import predict_project
-        result = predict_project(project_data)
+        # Leer de la tabla si la fila es de la versión vigente, no está vencida
+        # y el proyecto no cambió desde que se puntuó
+        if (project['resultado'] and project['changed_at'] is None
+                and project['model_version'] == model_version
+                and datetime.datetime.now() - project['scored_at'] <= PREDICTION_MAX_AGE):
+            connection.close()
+            return jsonify({'success': True, 'result': json.loads(project['resultado']), 'from_table': True})
 
-        return jsonify({'success': True, 'result': result})
+        # Fila faltante o desactualizada: inferencia en vivo y se materializa
+        result = ml_service.predict_project(_project_model_input(project))
+        try:
+            _save_predictions(cursor, model_version, [(project['id'], result)])
+            # Borrar solo la marca leída junto con los datos puntuados; si otra
+            # edición la actualizó mientras tanto, queda para el próximo scoring
+            if project['changed_at'] is not None:
+                cursor.execute(
+                    "DELETE FROM proyectos_cambios WHERE project_id = %s AND changed_at <= %s",
+                    (project['id'], project['changed_at'])
+                )
+            connection.commit()
+        except Error as e:
+            print(f"No se pudo guardar la predicción: {e}")
+        connection.close()
+
+        return jsonify({'success': True, 'result': result, 'from_table': False})
 
     except Exception as e:
         print(f"Error en predict_success: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _score_projects(query, params, chunk_size, workers):
+    """Puntúa en paralelo los proyectos que devuelve `query` y los guarda en `predicciones`.
+
+    `query` debe devolver c.changed_at (LEFT JOIN proyectos_cambios c). La marca
+    de cada proyecto puntuado se borra solo si sigue siendo la que se leyó con
+    sus datos; lo que cambie mientras tanto queda pendiente para la próxima.
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    read_conn = get_db_connection()
+    write_conn = get_db_connection()
+    if not read_conn or not write_conn:
+        click.echo('Error de conexión a la base de datos')
+        return 0
+
+    write_cursor = write_conn.cursor()
+    # Marca leída junto con cada proyecto marcado que todavía no se guardó
+    seen_marks = {}
+
+    # Cursor sin buffer: los proyectos se leen del servidor por bloques
+    read_cursor = read_conn.cursor(dictionary=True, buffered=False)
+    read_cursor.execute(query, params)
+
+    total = 0
+    # Repartir los núcleos entre los procesos para no sobresuscribir la CPU
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+    def store(future):
+        nonlocal total
+        model_version, scored = future.result()
+        _save_predictions(write_cursor, model_version, scored)
+        marks = [(project_id, seen_marks.pop(project_id)) for project_id, _ in scored if project_id in seen_marks]
+        if marks:
+            write_cursor.executemany(
+                "DELETE FROM proyectos_cambios WHERE project_id = %s AND changed_at <= %s", marks
+            )
+        write_conn.commit()
+        total += len(scored)
+        click.echo(f'  {total} proyectos puntuados')
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            while True:
+                rows = read_cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                items = [(row['id'], _project_model_input(row)) for row in rows]
+                seen_marks.update((row['id'], row['changed_at']) for row in rows if row['changed_at'] is not None)
+                pending.add(pool.submit(ml_service.score_projects_chunk, items, n_jobs=threads_per_worker))
+                # Limitar los lotes en vuelo para que la memoria no crezca con la tabla
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        store(future)
+            for future in pending:
+                store(future)
+    finally:
+        read_cursor.close()
+        write_cursor.close()
+        read_conn.close()
+        write_conn.close()
+
+    return total
+
+
+@app.cli.command('score-all')
+@click.option('--chunk-size', default=500, show_default=True, help='Proyectos por lote')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Procesos de scoring')
+def score_all_command(chunk_size, workers):
+    """Puntúa todos los proyectos y llena la tabla `predicciones`."""
+    total = _score_projects(
+        """
+        SELECT p.id, p.description, p.progreso, p.created_at, c.changed_at
+        FROM proyectos p
+        LEFT JOIN proyectos_cambios c ON c.project_id = p.id
+        """, (), chunk_size, workers
+    )
+    click.echo(f'Listo: {total} proyectos puntuados.')
+
+
+@app.cli.command('score-csv')
+@click.argument('input_csv', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output_csv', required=False)
+@click.option('--chunk-size', type=int, default=None, help='Filas por bloque (por defecto ML_SCORING_CHUNK_SIZE)')
+@click.option('--scope', default=model_registry.GLOBAL_SCOPE, help="global, cohort-<id> o user-<id>")
+def score_csv_command(input_csv, output_csv, chunk_size, scope):
+    """Puntúa un CSV de proyectos y escribe el resultado (por defecto, a stdout)."""
+    model_path = model_registry.scope_model_path(scope)
+    out = open(output_csv, 'w', encoding='utf-8', newline='') if output_csv else click.get_text_stream('stdout')
+    try:
+        for text in ml_service.score_csv(input_csv, model_path=model_path, chunksize=chunk_size):
+            out.write(text)
+    except (FileNotFoundError, ValueError) as e:
+        raise click.ClickException(str(e))
+    finally:
+        if output_csv:
+            out.close()
+
+
+@app.cli.command('score-dirty')
+@click.option('--chunk-size', default=500, show_default=True, help='Proyectos por lote')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Procesos de scoring')
+def score_dirty_command(chunk_size, workers):
+    """Vuelve a puntuar solo los proyectos nuevos, modificados o puntuados con otro modelo."""
+    model_version = ml_service.current_model_version()
+    if model_version is None:
+        click.echo('Modelo no encontrado. Entrena primero el modelo.')
+        return
+
+    total = _score_projects("""
+        SELECT p.id, p.description, p.progreso, p.created_at, c.changed_at
+        FROM proyectos p
+        LEFT JOIN predicciones pr ON pr.project_id = p.id
+        LEFT JOIN proyectos_cambios c ON c.project_id = p.id
+        WHERE pr.project_id IS NULL
+           OR pr.model_version <> %s
+           OR c.project_id IS NOT NULL
+    """, (model_version,), chunk_size, workers)
+    click.echo(f'Listo: {total} proyectos re-puntuados.')
+
+
 # Agregar estas rutas después de las rutas existentes de emprendedor
 
 @app.route('/emprendedor/probador_ml')
@@ -2335,9 +2817,8 @@ def api_predict_ml_test():
             'created_at': created_at
         }
         
-        # Usar la función de predicción existente
-        from ml_model_multiclass import predict_project
-        result = predict_project(project_data)
+        # Modelo del sandbox del usuario si ya entrenó uno; si no, el global
+        result = ml_service.predict_project(project_data, model_path=_sandbox_model_path(resolve=True))
         
         return jsonify({'success': True, 'result': result})
         
@@ -2351,6 +2832,101 @@ def api_predict_ml_test():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/predict_batch', methods=['POST'])
+def api_predict_batch():
+    """API para predecir el éxito de varios proyectos en una sola llamada"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'error': 'No autorizado'}), 401
+    
+    try:
+        data = request.json or {}
+        projects = data.get('projects')
+        
+        if not isinstance(projects, list) or not projects:
+            return jsonify({'success': False, 'error': 'Se requiere una lista de proyectos'}), 400
+        
+        if len(projects) > MAX_BATCH_PREDICTIONS:
+            return jsonify({
+                'success': False,
+                'error': f'Máximo {MAX_BATCH_PREDICTIONS} proyectos por solicitud'
+            }), 400
+        
+        # Normalizar cada proyecto al formato que espera el modelo
+        projects_data = []
+        for i, p in enumerate(projects):
+            if not isinstance(p, dict):
+                return jsonify({'success': False, 'error': 'Cada proyecto debe ser un objeto', 'index': i}), 400
+            # Acepta números o texto numérico ("45.5"); el modelo recorta a [0, 100]
+            progress = p.get('progress', p.get('progreso', 0))
+            try:
+                progress = float(progress) if progress not in (None, '') else 0.0
+            except (TypeError, ValueError):
+                progress = float('nan')
+            if progress != progress or progress in (float('inf'), float('-inf')):
+                return jsonify({
+                    'success': False,
+                    'error': f'Proyecto {i}: el progreso debe ser numérico',
+                    'index': i
+                }), 400
+            projects_data.append({
+                'description': p.get('description', '') or '',
+                'progress': progress,
+                'created_at': p.get('created_at', '') or ''
+            })
+        
+        results = ml_service.predict_projects(projects_data)
+        
+        return jsonify({'success': True, 'results': results})
+        
+    except FileNotFoundError:
+        return jsonify({
+            'success': False, 
+            'error': 'Modelo no encontrado. Debes entrenar el modelo primero cargando un dataset.'
+        }), 400
+    except Exception as e:
+        print(f"Error en api_predict_batch: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/score_csv', methods=['POST'])
+def api_score_csv():
+    """Puntúa un CSV (description,progress,created_at) y devuelve el CSV con las predicciones.
+
+    El archivo se lee y se responde por bloques: la memoria no depende del
+    tamaño del archivo y la respuesta empieza antes de terminar de leerlo.
+    """
+    if 'user_id' not in session or session.get('rol') not in ('Coordinador', 'Administrador'):
+        return jsonify({'success': False, 'error': 'No autorizado'}), 403
+    
+    file = request.files.get('dataset')
+    if file is None or file.filename == '':
+        return jsonify({'success': False, 'error': 'No se proporcionó archivo'}), 400
+    if not file.filename.endswith('.csv'):
+        return jsonify({'success': False, 'error': 'El archivo debe ser CSV'}), 400
+    
+    try:
+        chunksize = request.args.get('chunk_size', type=int)
+        rows = ml_service.score_csv(io.TextIOWrapper(file.stream, encoding='utf-8'), chunksize=chunksize)
+        # El primer bloque valida el modelo y las columnas mientras todavía se puede responder un error
+        first = next(rows, '')
+    except FileNotFoundError:
+        return jsonify({
+            'success': False,
+            'error': 'Modelo no encontrado. Debes entrenar el modelo primero cargando un dataset.'
+        }), 400
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'success': False, 'error': f'CSV inválido: {e}'}), 400
+    
+    registrar_actividad(session['user_id'], f"Puntuó el archivo {secure_filename(file.filename)}")
+    
+    filename = f"{os.path.splitext(secure_filename(file.filename))[0] or 'proyectos'}_puntuados.csv"
+    return Response(
+        stream_with_context(itertools.chain([first], rows)),
+        mimetype='text/csv; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
 @app.route('/emprendedor/entrenar_modelo_ml', methods=['POST'])
 def emprendedor_entrenar_modelo_ml():
     """Permite al emprendedor entrenar el modelo con su propio CSV"""
@@ -2358,6 +2934,11 @@ def emprendedor_entrenar_modelo_ml():
         return jsonify({'success': False, 'error': 'No autorizado'}), 401
     
     try:
+        # Rechazar por Content-Length antes de tocar request.files: al accederlo
+        # Werkzeug ya lee y guarda todo el cuerpo del upload
+        if request.content_length and request.content_length > MAX_TRAINING_UPLOAD_BYTES:
+            return jsonify({'success': False, 'error': 'El archivo supera el tamaño máximo permitido'}), 413
+        
         # Verificar que se haya subido un archivo
         if 'dataset' not in request.files:
             return jsonify({'success': False, 'error': 'No se proporcionó archivo'}), 400
@@ -2378,19 +2959,20 @@ def emprendedor_entrenar_modelo_ml():
             tmp_path = tmp.name
         
         try:
-            # Entrenar el modelo
-            from ml_model_multiclass import train_model
-            model_path = train_model(tmp_path)
+            # Rechazar datasets inválidos antes de encolar el fit
+            rejected = _rejected_training_dataset(tmp_path)
+            if rejected:
+                return rejected
+            
+            # Encolar el entrenamiento (se ejecuta en un proceso aparte)
+            job = submit_training_job(tmp_path, model_path=_sandbox_model_path(),
+                                      owner_id=session['user_id'],
+                                      description='Dataset personalizado (probador ML)')
             
             # Registrar actividad
-            from app import registrar_actividad
-            registrar_actividad(session['user_id'], "Entrenó el modelo ML con dataset personalizado")
+            registrar_actividad(session['user_id'], "Encoló entrenamiento del modelo ML con dataset personalizado")
             
-            return jsonify({
-                'success': True, 
-                'message': 'Modelo entrenado exitosamente',
-                'model_path': model_path
-            })
+            return _training_job_response(job)
         finally:
             # Limpiar archivo temporal
             if os.path.exists(tmp_path):
@@ -2480,17 +3062,15 @@ def emprendedor_reentrenar_modelo():
             tmp_path = tmp.name
         
         try:
-            # Entrenar el modelo
-            from ml_model_multiclass import train_model
-            model_path = train_model(tmp_path)
+            # Encolar el reentrenamiento (se ejecuta en un proceso aparte)
+            job = submit_training_job(tmp_path, model_path=_sandbox_model_path(),
+                                      owner_id=session['user_id'],
+                                      description='Reentrenamiento con dataset optimizado')
             
             # Registrar actividad
-            registrar_actividad(session['user_id'], "Reentreno el modelo ML")
+            registrar_actividad(session['user_id'], "Encoló reentrenamiento del modelo ML")
             
-            return jsonify({
-                'success': True, 
-                'message': 'Modelo reentrenado exitosamente con datos mejor diferenciados'
-            })
+            return _training_job_response(job)
         finally:
             # Limpiar archivo temporal
             if os.path.exists(tmp_path):
@@ -2522,6 +3102,7 @@ def normalize_proyectos(raw_proyectos):
         description = None
         created_at = None
         user = None
+        prediccion = None
 
         if isinstance(p, dict):
             # aceptar varias posibles claves y normalizar
@@ -2530,6 +3111,7 @@ def normalize_proyectos(raw_proyectos):
             description = p.get('description') or p.get('descripcion') or ''
             created_at = p.get('created_at') or p.get('createdAt') or p.get('fecha') or ''
             user = p.get('user') or p.get('username') or p.get('autor') or None
+            prediccion = p.get('prediccion')
         else:
             progreso = getattr(p, 'progreso', None) or getattr(p, 'progress', 0) or 0
             title = getattr(p, 'title', None) or getattr(p, 'titulo', '') or ''
@@ -2549,28 +3131,43 @@ def normalize_proyectos(raw_proyectos):
             'description': description,
             'progreso': progreso,
             'progress': progreso,   # mantener ambas claves para compatibilidad con plantillas
-            'created_at': created_at
+            'created_at': created_at,
+            'prediccion': prediccion
         }
         normalized.append(proj)
     return normalized
 
+@app.route('/healthz/ready')
+def healthz_ready():
+    """Readiness: 200 solo cuando el modelo está residente y caliente en este worker.
+
+    Tras un reentrenamiento o rollback el worker sigue listo con la versión
+    anterior mientras la nueva se carga en segundo plano.
+    """
+    status = ml_service.model_status(reload=True)
+    code = 200 if status['model_resident'] else 503
+    return jsonify({'ready': status['model_resident'], 'model_version': status['model_version'],
+                    'model_current': status['model_current']}), code
+
 @app.route('/debug/model_status')
 def debug_model_status():
     """Ruta temporal para debug del modelo"""
     try:
-        from ml_model_multiclass import load_model
-        model = load_model()
-        if model:
+        # Solo consulta el estado: no carga el artefacto
+        status = ml_service.model_status()
+        if status['model_exists']:
             return jsonify({
                 'success': True,
-                'message': 'Modelo cargado correctamente',
-                'model_exists': True
+                'message': 'Modelo cargado correctamente' if status['model_resident'] else 'Modelo disponible (no cargado en este worker)',
+                **status,
+                'model_profile': ml_service.model_profile(),
+                'prediction_cache': ml_service.prediction_cache_stats()
             })
         else:
             return jsonify({
                 'success': False,
                 'message': 'Modelo no encontrado',
-                'model_exists': False
+                **status
             })
     except Exception as e:
         return jsonify({
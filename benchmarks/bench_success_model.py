@@ -0,0 +1,217 @@
+"""Benchmark de entrenamiento e inferencia del modelo de éxito (sin conexión).
+
+Genera datasets sintéticos del tamaño pedido a partir de los ejemplos de
+generate_optimized_dataset() y data/make_demo_csv.py, y mide para cada
+combinación de tamaño y parámetros del pipeline:
+
+    featurize_s         _make_features sobre todo el dataset
+    fit_s               pipe.fit
+    artifact_bytes      tamaño del artefacto serializado con joblib (compactado)
+    load_s              joblib.load del artefacto (compactado)
+    raw_artifact_bytes  ídem antes de compact_pipeline
+    raw_load_s          ídem antes de compact_pipeline
+    single_p50_ms/p99   latencia de una predicción (features + predict_proba)
+    compiled_p50_ms/p99 ídem con el bosque compilado (compiled_forest.py)
+    compiled_max_diff   diferencia máxima de probabilidades contra sklearn
+    batch_rows_per_s    throughput prediciendo un lote
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_success_model.py --sizes 1000 10000 --output bench.json
+    python benchmarks/bench_success_model.py --n-estimators 50 200 --ngram-max 1 3
+    python benchmarks/bench_success_model.py --baseline bench_anterior.json
+"""
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import itertools
+import platform
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'data'))
+
+import joblib
+import sklearn
+from ml_model_multiclass import (build_pipeline, compact_pipeline, _make_features, _map_target,
+                                 generate_optimized_dataset)
+from make_demo_csv import make_demo_dataframe
+from compiled_forest import CompiledForest
+
+# Referencia fija para que las features sean reproducibles entre corridas
+REFERENCE_TIME = pd.Timestamp('2025-12-01')
+
+
+def synthetic_dataset(n_rows, seed=42):
+    """Dataset sintético de n_rows filas con vocabulario que crece con el tamaño"""
+    rng = np.random.RandomState(seed)
+    templates = pd.concat([
+        pd.read_csv(io.StringIO(generate_optimized_dataset())),
+        make_demo_dataframe(200, seed=seed, now=REFERENCE_TIME)
+    ], ignore_index=True)
+    vocab = np.array(sorted(set(' '.join(templates['description']).lower().split())))
+
+    df = templates.iloc[rng.randint(len(templates), size=n_rows)].reset_index(drop=True)
+    # Ruido: palabras del vocabulario + tokens con distribución Zipf (como texto real)
+    extra = rng.choice(vocab, size=(n_rows, 4))
+    rare = rng.zipf(1.5, size=(n_rows, 3)) % 50000
+    df['description'] = [
+        f"{d} {' '.join(e)} {' '.join(f'termino{r}' for r in z)}"
+        for d, e, z in zip(df['description'], extra, rare)
+    ]
+    df['progress'] = (df['progress'] + rng.randint(-10, 11, size=n_rows)).clip(0, 100)
+    df['created_at'] = [
+        (REFERENCE_TIME - pd.Timedelta(days=int(d))).date().isoformat()
+        for d in rng.randint(1, 400, size=n_rows)
+    ]
+    return df
+
+
+def _timeit(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run_case(df, params, latency_samples=200, batch_size=1000):
+    """Mide una combinación de dataset y parámetros del pipeline"""
+    X, featurize_s = _timeit(lambda: _make_features(df, reference_time=REFERENCE_TIME))
+    y = _map_target(df['outcome'])
+
+    pipe = build_pipeline(**params)
+    _, fit_s = _timeit(lambda: pipe.fit(X, y))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = os.path.join(tmp, 'raw.joblib')
+        joblib.dump({'pipeline': pipe}, raw_path)
+        raw_artifact_bytes = os.path.getsize(raw_path)
+        _, raw_load_s = _timeit(lambda: joblib.load(raw_path))
+
+        compact_pipeline(pipe)
+        path = os.path.join(tmp, 'model.joblib')
+        joblib.dump({'pipeline': pipe}, path)
+        artifact_bytes = os.path.getsize(path)
+        meta, load_s = _timeit(lambda: joblib.load(path))
+    loaded = meta['pipeline']
+
+    # Latencia de una fila, como en /predict_success (features + predict_proba)
+    sample = df.iloc[:latency_samples][['description', 'progress', 'created_at']].to_dict('records')
+    latencies = []
+    for project in sample:
+        _, elapsed = _timeit(lambda: loaded.predict_proba(
+            _make_features(pd.DataFrame([project]), reference_time=REFERENCE_TIME)))
+        latencies.append(elapsed * 1000)
+
+    # Mismo camino con el bosque compilado (transformación de sklearn + recorrido en arrays)
+    pre = loaded[:-1]
+    forest = CompiledForest.from_estimator(loaded.steps[-1][1])
+    compiled_latencies = []
+    for project in sample:
+        _, elapsed = _timeit(lambda: forest.predict_proba(pre.transform(
+            _make_features(pd.DataFrame([project]), reference_time=REFERENCE_TIME))))
+        compiled_latencies.append(elapsed * 1000)
+
+    batch = df.iloc[:batch_size]
+    X_batch = _make_features(batch, reference_time=REFERENCE_TIME)
+    compiled_max_diff = float(np.abs(
+        forest.predict_proba(pre.transform(X_batch)) - loaded.predict_proba(X_batch)).max())
+
+    _, batch_s = _timeit(lambda: loaded.predict_proba(
+        _make_features(batch, reference_time=REFERENCE_TIME)))
+
+    return {
+        'rows': len(df),
+        'params': {k: list(v) if isinstance(v, tuple) else v for k, v in params.items()},
+        'featurize_s': round(featurize_s, 4),
+        'fit_s': round(fit_s, 4),
+        'train_score': round(float(loaded.score(X, y)), 4),
+        'artifact_bytes': artifact_bytes,
+        'load_s': round(load_s, 4),
+        'raw_artifact_bytes': raw_artifact_bytes,
+        'raw_load_s': round(raw_load_s, 4),
+        'single_p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'single_p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'compiled_p50_ms': round(float(np.percentile(compiled_latencies, 50)), 3),
+        'compiled_p99_ms': round(float(np.percentile(compiled_latencies, 99)), 3),
+        'compiled_max_diff': compiled_max_diff,
+        'batch_rows': len(batch),
+        'batch_rows_per_s': round(len(batch) / batch_s, 1)
+    }
+
+
+def _case_key(result):
+    return json.dumps([result['rows'], result['params']], sort_keys=True)
+
+
+def compare(report, baseline):
+    """Imprime la variación porcentual contra un reporte anterior"""
+    previous = {_case_key(r): r for r in baseline.get('results', [])}
+    metrics = ['featurize_s', 'fit_s', 'artifact_bytes', 'load_s', 'single_p99_ms', 'compiled_p99_ms',
+               'batch_rows_per_s']
+    for result in report['results']:
+        old = previous.get(_case_key(result))
+        if not old:
+            continue
+        deltas = []
+        for m in metrics:
+            if old.get(m):
+                deltas.append(f"{m} {100 * (result[m] - old[m]) / old[m]:+.1f}%")
+        print(f"rows={result['rows']} {result['params']}: " + ', '.join(deltas), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--n-estimators', type=int, nargs='+', default=[200])
+    parser.add_argument('--max-depth', type=int, nargs='+', default=[15])
+    parser.add_argument('--ngram-max', type=int, nargs='+', default=[3], help='ngram_range=(1, N)')
+    parser.add_argument('--max-features', type=int, nargs='+', default=[3000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Ruta del reporte JSON (por defecto, stdout)')
+    parser.add_argument('--baseline', help='Reporte JSON anterior para comparar')
+    args = parser.parse_args()
+
+    grid = [
+        {'n_estimators': n, 'max_depth': d, 'ngram_range': (1, g), 'max_features': f}
+        for n, d, g, f in itertools.product(args.n_estimators, args.max_depth, args.ngram_max, args.max_features)
+    ]
+
+    results = []
+    for size in args.sizes:
+        df = synthetic_dataset(size, seed=args.seed)
+        for params in grid:
+            print(f"rows={size} {params}...", file=sys.stderr)
+            results.append(run_case(df, params))
+
+    report = {
+        'generated_at': pd.Timestamp.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'sklearn': sklearn.__version__,
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'cpu_count': os.cpu_count()
+        },
+        'results': results
+    }
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Verifica que el featurizador escalar coincide con _make_features.
+
+Compara, para un dataset sintético y una lista de casos borde (fechas con zona
+horaria, formatos no ISO, progreso como texto, descripciones vacías o nulas),
+las features de _project_features contra las de _make_features, tanto sobre
+el dataset completo como fila por fila. Termina con código 1 si hay alguna
+diferencia, y reporta el tiempo por proyecto de cada camino.
+
+Uso (desde la raíz del repo):
+    python benchmarks/check_feature_parity.py
+    python benchmarks/check_feature_parity.py --rows 20000
+"""
+import os
+import sys
+import time
+import argparse
+import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from ml_model_multiclass import (_make_features, _project_features, _features_frame,
+                                 _reference_timestamp, MODEL_FEATURES)
+from bench_success_model import synthetic_dataset, REFERENCE_TIME
+
+EDGE_CASES = [
+    {'description': '', 'progress': 0, 'created_at': ''},
+    {'description': None, 'progress': None, 'created_at': None},
+    {'description': float('nan'), 'progress': float('nan'), 'created_at': 'None'},
+    {'description': 'Ventas de $5000 USD, 30% de clientes activos', 'progress': '75', 'created_at': '2025-06-01'},
+    {'description': 'MVP en pruebas con 10 usuarios', 'progress': '  40 ', 'created_at': '2025-06-01 10:30:00'},
+    {'description': 'Idea inicial', 'progress': 'n/a', 'created_at': '2025-06-01T10:30:00.123456Z'},
+    {'description': 'Idea inicial', 'progress': 120, 'created_at': '2025-06-01T23:30:00-05:00'},
+    {'description': 'idea', 'progress': -5, 'created_at': '01/06/2025'},
+    {'description': 'concepto', 'progress': 55.5, 'created_at': 'June 1, 2025'},
+    {'description': 'beta', 'progress': 69.99, 'created_at': 'no es una fecha'},
+    {'description': 'beta', 'progress': 70, 'created_at': '2030-01-01'},
+    {'description': 'beta', 'progress': 40, 'created_at': '1500-01-01'},
+    {'description': 12345, 'progress': True, 'created_at': datetime.date(2025, 3, 1)},
+    {'description': 'Ingresos recurrentes de 2 por ciento', 'progress': 90,
+     'created_at': datetime.datetime(2025, 3, 1, 8, 0)},
+    {'description': 'mrr', 'progress': 90,
+     'created_at': datetime.datetime(2025, 3, 1, 8, 0, tzinfo=datetime.timezone.utc)},
+    {'description': 'mrr', 'progress': 90, 'created_at': pd.Timestamp('2025-03-01 08:00')},
+    {'description': 'MRR   con\tespacios\nvarios', 'progress': 30},
+]
+
+
+def _compare(expected, actual, label):
+    """Lista de diferencias entre dos DataFrames de features"""
+    errors = []
+    if list(expected['description']) != list(actual['description']):
+        errors.append(f'{label}: description distinta')
+    for col in MODEL_FEATURES:
+        a = expected[col].to_numpy(dtype=float)
+        b = actual[col].to_numpy(dtype=float)
+        bad = np.flatnonzero(~np.isclose(a, b, rtol=0, atol=1e-9))
+        if len(bad):
+            errors.append(f'{label}: {col} difiere en {len(bad)} filas (p. ej. {a[bad[0]]} vs {b[bad[0]]})')
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    ref = _reference_timestamp(REFERENCE_TIME)
+    df = synthetic_dataset(args.rows)
+    records = df[['description', 'progress', 'created_at']].to_dict('records')
+    errors = []
+
+    start = time.perf_counter()
+    expected = _make_features(df, reference_time=ref)
+    vector_s = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = _features_frame([_project_features(p, ref) for p in records])
+    scalar_s = time.perf_counter() - start
+    errors += _compare(expected.reset_index(drop=True), actual, 'dataset')
+
+    # Casos borde de a uno (como llegan en una request) y todos juntos
+    for i, case in enumerate(EDGE_CASES):
+        try:
+            expected = _make_features(pd.DataFrame([case]), reference_time=ref)
+        except Exception as e:
+            print(f'caso {i}: _make_features falla ({e}); se omite')
+            continue
+        errors += _compare(expected, _features_frame([_project_features(case, ref)]), f'caso {i} {case}')
+
+    single = records[:200]
+    start = time.perf_counter()
+    for p in single:
+        _make_features(pd.DataFrame([p]), reference_time=ref)
+    single_vector_us = (time.perf_counter() - start) / len(single) * 1e6
+    start = time.perf_counter()
+    for p in single:
+        _project_features(p, ref)
+    single_scalar_us = (time.perf_counter() - start) / len(single) * 1e6
+
+    print(f'{args.rows} filas: _make_features {vector_s:.3f}s, _project_features {scalar_s:.3f}s')
+    print(f'un proyecto: _make_features {single_vector_us:.0f}us, _project_features {single_scalar_us:.1f}us')
+    if errors:
+        print('\n'.join(errors))
+        sys.exit(1)
+    print('OK: mismas features en ambos caminos')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Verifica que las features de texto vectorizadas coinciden con la versión fila por fila.
+
+Compara desc_len, word_count y los puntajes de keywords de _make_features
+contra la implementación original con .apply (reproducida acá), sobre un
+dataset sintético más casos borde: descripciones vacías, nulas, muy largas,
+keywords anidadas o superpuestas y espacios mezclados. Termina con código 1
+si hay alguna diferencia, y reporta el tiempo de cada camino.
+
+Uso (desde la raíz del repo):
+    python benchmarks/check_keyword_parity.py
+    python benchmarks/check_keyword_parity.py --rows 100000 --long-chars 20000
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from ml_model_multiclass import (_make_features, HIGH_SUCCESS_KEYWORDS, MEDIUM_SUCCESS_KEYWORDS,
+                                 LOW_SUCCESS_KEYWORDS)
+from bench_success_model import synthetic_dataset, REFERENCE_TIME
+
+COLUMNS = ['desc_len', 'word_count', 'high_keywords', 'medium_keywords', 'low_keywords', 'num_keywords']
+
+EDGE_CASES = [
+    '',
+    None,
+    float('nan'),
+    '   ',
+    'MRR   con\tespacios\nvarios',
+    'primeros clientes activos',
+    'Clientes Activos con INGRESOS recurrentes',
+    'idea inicial, concepto en exploración e investigación',
+    'ñandú 🚀 crecimiento',
+]
+
+
+def _reference_features(df):
+    """Features de texto como las calculaba _make_features antes de vectorizar"""
+    description = df['description'].fillna('').astype(str)
+    lower = description.str.lower()
+    out = pd.DataFrame(index=df.index)
+    out['desc_len'] = description.apply(len)
+    out['word_count'] = description.apply(lambda t: len(str(t).split()))
+    out['high_keywords'] = lower.apply(lambda t: sum(2 if kw in t else 0 for kw in HIGH_SUCCESS_KEYWORDS))
+    out['medium_keywords'] = lower.apply(lambda t: sum(1 if kw in t else 0 for kw in MEDIUM_SUCCESS_KEYWORDS))
+    out['low_keywords'] = lower.apply(lambda t: sum(1 if kw in t else 0 for kw in LOW_SUCCESS_KEYWORDS))
+    out['num_keywords'] = out['high_keywords'] * 3 + out['medium_keywords'] * 2 + out['low_keywords']
+    return out
+
+
+def _compare(expected, actual, label):
+    errors = []
+    for col in COLUMNS:
+        a = expected[col].to_numpy(dtype=np.int64)
+        b = actual[col].to_numpy(dtype=np.int64)
+        bad = np.flatnonzero(a != b)
+        if len(bad):
+            errors.append(f'{label}: {col} difiere en {len(bad)} filas (p. ej. {a[bad[0]]} vs {b[bad[0]]})')
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--long-chars', type=int, default=20000,
+                        help='Largo de las descripciones largas agregadas al dataset')
+    args = parser.parse_args()
+
+    df = synthetic_dataset(args.rows)[['description', 'progress', 'created_at']]
+    # Descripciones largas (columna TEXT): con un dtype de ancho fijo inflarían todas las filas
+    long_text = ('clientes activos ' * (args.long_chars // 17 + 1))[:args.long_chars]
+    df.loc[df.index[:3], 'description'] = [long_text, long_text.upper(), 'x' * args.long_chars]
+    edge = pd.DataFrame({'description': EDGE_CASES, 'progress': 50, 'created_at': '2025-06-01'})
+    df = pd.concat([df, edge], ignore_index=True)
+
+    start = time.perf_counter()
+    expected = _reference_features(df)
+    reference_s = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = _make_features(df, reference_time=REFERENCE_TIME)
+    vector_s = time.perf_counter() - start
+
+    errors = _compare(expected, actual, 'dataset')
+    for i, case in enumerate(EDGE_CASES):
+        one = pd.DataFrame({'description': [case], 'progress': [50], 'created_at': ['2025-06-01']})
+        errors += _compare(_reference_features(one), _make_features(one, reference_time=REFERENCE_TIME),
+                           f'caso {i} {case!r}')
+
+    print(f'{len(df)} filas: apply {reference_s:.3f}s, _make_features {vector_s:.3f}s')
+    if errors:
+        print('\n'.join(errors))
+        sys.exit(1)
+    print('OK: mismas features de texto en ambos caminos')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Verifica que las probabilidades del modo streaming son razonables, no solo que entrena.
+
+Entrena train_model_streaming sobre un dataset sintético y evalúa en otro
+(semilla distinta, nunca visto) que:
+  - no haya empates exactos entre las dos clases más probables (el síntoma
+    del uno-contra-resto saturado: [0.5, 0.5, 0]),
+  - la confianza media no se aleje de la precisión (error de calibración),
+  - las filas con probabilidad máxima > 0.99 casi nunca se equivoquen,
+  - la log-loss quede por debajo de la de predecir siempre 1/3.
+Termina con código 1 si alguna condición falla.
+
+Uso (desde la raíz del repo):
+    python benchmarks/check_streaming_calibration.py
+    python benchmarks/check_streaming_calibration.py --rows 50000 --test-rows 10000
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from ml_model_multiclass import (train_model_streaming, load_model, _make_features, _map_target,
+                                 _reference_timestamp)
+from bench_success_model import synthetic_dataset
+
+MAX_TIE_RATE = 0.01
+MAX_CALIBRATION_GAP = 0.05
+MIN_CONFIDENT_ACCURACY = 0.98
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=30000)
+    parser.add_argument('--test-rows', type=int, default=5000)
+    parser.add_argument('--chunksize', type=int, default=5000)
+    args = parser.parse_args()
+
+    test = synthetic_dataset(args.test_rows, seed=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'train.csv')
+        synthetic_dataset(args.rows, seed=1).to_csv(csv_path, index=False)
+        model_path = os.path.join(tmp, 'streaming.joblib')
+        report = train_model_streaming(csv_path, model_path=model_path, chunksize=args.chunksize)
+        meta = load_model(model_path)
+
+    proba = meta['pipeline'].predict_proba(_make_features(test, reference_time=_reference_timestamp()))
+    y = _map_target(test['outcome']).to_numpy()
+    top = np.sort(proba, axis=1)
+    confidence = top[:, -1]
+    correct = proba.argmax(axis=1) == y
+    confident = confidence > 0.99
+
+    tie_rate = float(np.mean(top[:, -1] - top[:, -2] < 1e-6))
+    gap = abs(float(confidence.mean()) - float(correct.mean()))
+    confident_accuracy = float(correct[confident].mean()) if confident.any() else 1.0
+    log_loss = float(-np.log(np.clip(proba[np.arange(len(y)), y], 1e-15, None)).mean())
+
+    print(f"calibración: {report.get('calibration')}")
+    print(f"precisión {correct.mean():.3f}, confianza media {confidence.mean():.3f}, "
+          f"log-loss {log_loss:.3f} (uniforme {np.log(3):.3f})")
+    print(f"max > 0.99 en {confident.mean()*100:.1f}% de las filas (precisión {confident_accuracy:.3f}), "
+          f"empates {tie_rate*100:.2f}%")
+
+    errors = []
+    if tie_rate > MAX_TIE_RATE:
+        errors.append(f'empates entre las dos clases más probables en {tie_rate*100:.1f}% de las filas')
+    if gap > MAX_CALIBRATION_GAP:
+        errors.append(f'la confianza media se aleja {gap:.3f} de la precisión')
+    if confident_accuracy < MIN_CONFIDENT_ACCURACY:
+        errors.append(f'las filas con max > 0.99 aciertan solo {confident_accuracy:.3f}')
+    if log_loss >= np.log(3):
+        errors.append(f'log-loss {log_loss:.3f} no mejora a la distribución uniforme')
+    if errors:
+        print('\n'.join(errors))
+        sys.exit(1)
+    print('OK: probabilidades calibradas en datos no vistos')
+
+
+if __name__ == '__main__':
+    main()
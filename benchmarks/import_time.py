@@ -0,0 +1,108 @@
+"""Reporte de tiempos de import (resumen de python -X importtime).
+
+Importa cada módulo en un intérprete nuevo con -X importtime y resume el
+tiempo total y los paquetes de primer nivel más caros (tiempo acumulado).
+Sirve para verificar que `import app` no arrastra pandas/scikit-learn.
+
+Uso (desde la raíz del repo):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --modules app ml_model_multiclass --repeat 5
+    python benchmarks/import_time.py --output imports.json --baseline imports_anterior.json
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Paquetes que no deberían cargarse al importar la app
+HEAVY_PACKAGES = ['pandas', 'numpy', 'sklearn', 'scipy', 'joblib']
+
+
+def _parse_importtime(stderr):
+    """{módulo: (self_us, cumulative_us, nivel)} a partir de la salida de -X importtime"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        except ValueError:
+            continue
+        level = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), level)
+    return modules
+
+
+def measure_module(module, repeat=3, top=10):
+    """Mide `import module` en `repeat` intérpretes nuevos y devuelve la mediana"""
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f'No se pudo importar {module}:\n{proc.stderr[-2000:]}')
+        runs.append(_parse_importtime(proc.stderr))
+
+    totals = [sum(self_us for self_us, _, _ in run.values()) for run in runs]
+    median_run = runs[totals.index(sorted(totals)[len(totals) // 2])]
+
+    # Paquetes de primer nivel (nivel 1 en el árbol de importtime) por tiempo acumulado
+    top_level = sorted(
+        ((name, cumulative) for name, (_, cumulative, level) in median_run.items() if level == 1),
+        key=lambda item: item[1], reverse=True
+    )
+    return {
+        'module': module,
+        'total_ms': round(statistics.median(totals) / 1000, 1),
+        'modules_imported': len(median_run),
+        'heavy_loaded': [p for p in HEAVY_PACKAGES if p in median_run],
+        'top_cumulative_ms': [{'module': name, 'ms': round(us / 1000, 1)} for name, us in top_level[:top]]
+    }
+
+
+def compare(report, baseline):
+    """Imprime la variación contra un reporte anterior"""
+    previous = {r['module']: r for r in baseline.get('results', [])}
+    for result in report['results']:
+        old = previous.get(result['module'])
+        if old and old.get('total_ms'):
+            delta = 100 * (result['total_ms'] - old['total_ms']) / old['total_ms']
+            print(f"{result['module']}: {old['total_ms']}ms -> {result['total_ms']}ms ({delta:+.1f}%)",
+                  file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=['app', 'ml_service', 'ml_model_multiclass'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10, help='Paquetes más caros a listar por módulo')
+    parser.add_argument('--output', help='Ruta del reporte JSON (por defecto, stdout)')
+    parser.add_argument('--baseline', help='Reporte JSON anterior para comparar')
+    args = parser.parse_args()
+
+    report = {
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'results': [measure_module(m, args.repeat, args.top) for m in args.modules]
+    }
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
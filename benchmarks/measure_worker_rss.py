@@ -0,0 +1,133 @@
+"""Mide la memoria por worker al cargar el modelo de éxito.
+
+Simula N workers (como gunicorn) que cargan el modelo y hacen una predicción,
+y reporta RSS, PSS y USS de cada uno mientras todos están vivos. PSS reparte
+las páginas compartidas entre los procesos que las usan, así que es la métrica
+que muestra el ahorro de memoria real.
+
+Modos:
+    private  cada worker hace joblib.load sin mmap (comportamiento anterior)
+    mmap     cada worker hace joblib.load(mmap_mode='r')
+    preload  el proceso padre carga el modelo antes del fork (gunicorn preload_app)
+
+Uso (desde la raíz del repo, solo Linux):
+    python benchmarks/measure_worker_rss.py --workers 4
+    python benchmarks/measure_worker_rss.py --workers 4 --modes private mmap --json
+"""
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_PROJECT = {
+    'description': 'Prototipo funcional con 20 usuarios de prueba y feedback positivo',
+    'progress': 55,
+    'created_at': '2025-09-20'
+}
+
+
+def _memory_kb():
+    """RSS, PSS y USS del proceso actual en KB (Linux)"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss_kb': values.get('Rss', 0),
+        'pss_kb': values.get('Pss', 0),
+        'uss_kb': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    }
+
+
+def _worker(mode, model_path, barrier, results):
+    import joblib
+    import pandas as pd
+    from ml_model_multiclass import _make_features
+
+    before = _memory_kb()
+    if mode == 'preload':
+        meta = _PRELOADED
+    else:
+        meta = joblib.load(model_path, mmap_mode='r' if mode == 'mmap' else None)
+    meta['pipeline'].predict_proba(_make_features(pd.DataFrame([SAMPLE_PROJECT])))
+
+    # Medir con todos los workers vivos para que PSS refleje lo compartido
+    barrier.wait()
+    after = _memory_kb()
+    results.put({'pid': os.getpid(), 'before': before, 'after': after})
+    barrier.wait()
+
+
+_PRELOADED = None
+
+
+def measure(mode, model_path, workers):
+    global _PRELOADED
+    import joblib
+
+    ctx = multiprocessing.get_context('fork')
+    _PRELOADED = joblib.load(model_path) if mode == 'preload' else None
+
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(mode, model_path, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    _PRELOADED = None
+
+    def avg(key, when):
+        return round(sum(r[when][key] for r in rows) / len(rows))
+
+    return {
+        'mode': mode,
+        'workers': workers,
+        'avg_rss_kb': avg('rss_kb', 'after'),
+        'avg_pss_kb': avg('pss_kb', 'after'),
+        'avg_uss_kb': avg('uss_kb', 'after'),
+        'total_pss_kb': sum(r['after']['pss_kb'] for r in rows),
+        'avg_model_uss_delta_kb': round(sum(r['after']['uss_kb'] - r['before']['uss_kb'] for r in rows) / len(rows)),
+        'per_worker': rows
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--model', default=None, help='Artefacto a medir (por defecto, el modelo actual)')
+    parser.add_argument('--modes', nargs='+', default=['private', 'mmap', 'preload'],
+                        choices=['private', 'mmap', 'preload'])
+    parser.add_argument('--json', action='store_true', help='Imprime el reporte completo en JSON')
+    args = parser.parse_args()
+
+    from ml_model_multiclass import resolve_model_path
+    model_path = args.model or resolve_model_path()
+    if not os.path.exists(model_path):
+        sys.exit(f'Modelo no encontrado: {model_path}')
+
+    report = {
+        'model_path': model_path,
+        'model_size_kb': os.path.getsize(model_path) // 1024,
+        'results': [measure(mode, model_path, args.workers) for mode in args.modes]
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Modelo: {model_path} ({report['model_size_kb']} KB), {args.workers} workers")
+    print(f"{'modo':<10}{'RSS/worker':>12}{'PSS/worker':>12}{'USS/worker':>12}{'PSS total':>12}")
+    for r in report['results']:
+        print(f"{r['mode']:<10}{r['avg_rss_kb']:>10}KB{r['avg_pss_kb']:>10}KB"
+              f"{r['avg_uss_kb']:>10}KB{r['total_pss_kb']:>10}KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""Motor de inferencia compilado para bosques de árboles de scikit-learn.
+
+Aplana los árboles de un RandomForestClassifier ya entrenado en arrays
+contiguos de NumPy (feature, umbral, hijos y probabilidades de las hojas) y
+recorre todos los árboles a la vez con indexación vectorizada, sin la
+validación por llamada ni el despacho por árbol de sklearn.
+
+Los resultados coinciden con forest.predict_proba salvo redondeo: X se
+convierte a float32 como hace sklearn antes de comparar con los umbrales.
+
+Lo que se guarda (pickle/joblib) es la forma compacta: solo los nodos internos
+llevan feature, umbral e hijos, y solo las hojas llevan probabilidades, en el
+tipo entero más chico que alcance. Los arrays completos para el recorrido se
+derivan al cargar.
+"""
+import numpy as np
+from scipy import sparse
+
+# Filas por bloque al recorrer: acota la matriz densa y la de nodos
+BLOCK_ROWS = 1024
+
+# Constantes de sklearn.tree._tree para hojas
+TREE_LEAF = -1
+TREE_UNDEFINED = -2
+
+
+def _min_int_dtype(max_value):
+    """Tipo entero con signo más chico que representa 0..max_value"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _floor_float32(values):
+    """Redondea umbrales float64 al float32 inmediato inferior.
+
+    Para x float32, x <= t equivale exactamente a x <= floor32(t), así que
+    guardar los umbrales en float32 no cambia ninguna decisión del árbol.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    over = rounded.astype(np.float64) > values
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+class CompiledForest:
+    """Bosque aplanado: primero los nodos internos de todos los árboles, después las hojas.
+
+    En memoria las hojas apuntan a sí mismas con umbral +inf, así el recorrido
+    puede dar siempre max_depth pasos sin ramas.
+    """
+
+    # Atributos que se persisten; el resto se deriva en _expand()
+    _STATE = ('feature', 'threshold', 'left', 'right', 'leaf_value', 'roots',
+              'tree_internal', 'tree_leaves', 'max_depth', 'n_features', 'classes_')
+
+    def __init__(self, feature, threshold, left, right, leaf_value, roots,
+                 tree_internal, tree_leaves, max_depth, n_features, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.tree_internal = tree_internal
+        self.tree_leaves = tree_leaves
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.classes_ = classes
+        self._expand()
+
+    def _expand(self):
+        """Arrays completos (internos + hojas) usados por el recorrido"""
+        n_internal = len(self.feature)
+        n_nodes = n_internal + len(self.leaf_value)
+        self.n_internal = n_internal
+
+        self._feature = np.zeros(n_nodes, dtype=np.intp)
+        self._feature[:n_internal] = self.feature
+        self._threshold = np.full(n_nodes, np.inf, dtype=np.float32)
+        self._threshold[:n_internal] = self.threshold
+
+        # Hijos intercalados [izq, der] por nodo: el paso es un solo gather
+        children = np.repeat(np.arange(n_nodes, dtype=np.intp), 2).reshape(n_nodes, 2)
+        children[:n_internal, 0] = self.left
+        children[:n_internal, 1] = self.right
+        self._children = children.ravel()
+        self._roots = self.roots.astype(np.intp)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self._STATE}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._expand()
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def node_count(self):
+        return self.n_internal + len(self.leaf_value)
+
+    @classmethod
+    def from_estimator(cls, forest):
+        """Exporta un bosque entrenado (RandomForestClassifier o similar)"""
+        estimators = getattr(forest, 'estimators_', None)
+        if not estimators or not all(hasattr(est, 'tree_') for est in estimators):
+            raise TypeError(f'{type(forest).__name__} no es un bosque de árboles entrenado')
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError('Solo se soportan bosques de una salida')
+
+        trees = [est.tree_ for est in estimators]
+        is_leaf = [tree.children_left == TREE_LEAF for tree in trees]
+        tree_leaves = np.array([leaf.sum() for leaf in is_leaf], dtype=np.int32)
+        tree_internal = np.array([len(leaf) for leaf in is_leaf], dtype=np.int32) - tree_leaves
+        n_internal = int(tree_internal.sum())
+        internal_start = np.concatenate([[0], np.cumsum(tree_internal)[:-1]])
+        leaf_start = n_internal + np.concatenate([[0], np.cumsum(tree_leaves)[:-1]])
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        for tree, leaf, i_start, l_start in zip(trees, is_leaf, internal_start, leaf_start):
+            # Índice global de cada nodo local del árbol
+            position = np.empty(len(leaf), dtype=np.int64)
+            position[~leaf] = i_start + np.arange((~leaf).sum())
+            position[leaf] = l_start + np.arange(leaf.sum())
+
+            features.append(tree.feature[~leaf])
+            thresholds.append(tree.threshold[~leaf])
+            lefts.append(position[tree.children_left[~leaf]])
+            rights.append(position[tree.children_right[~leaf]])
+
+            # Probabilidades de hoja, normalizadas como DecisionTreeClassifier.predict_proba
+            proba = np.asarray(tree.value[leaf, 0, :], dtype=np.float64)
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(proba / normalizer)
+            roots.append(position[0])
+
+        node_dtype = _min_int_dtype(n_internal + int(tree_leaves.sum()))
+        return cls(
+            feature=np.concatenate(features).astype(_min_int_dtype(forest.n_features_in_)),
+            threshold=_floor_float32(np.concatenate(thresholds)),
+            left=np.concatenate(lefts).astype(node_dtype),
+            right=np.concatenate(rights).astype(node_dtype),
+            leaf_value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=node_dtype),
+            tree_internal=tree_internal,
+            tree_leaves=tree_leaves,
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features=forest.n_features_in_,
+            classes=np.asarray(forest.classes_)
+        )
+
+    def to_trees(self):
+        """Reconstruye los sklearn.tree._tree.Tree de cada árbol (solo lo necesario para predecir)"""
+        from sklearn.tree._tree import Tree, NODE_DTYPE
+
+        n_classes = np.array([len(self.classes_)], dtype=np.intp)
+        internal_start = np.concatenate([[0], np.cumsum(self.tree_internal)[:-1]])
+        leaf_start = self.n_internal + np.concatenate([[0], np.cumsum(self.tree_leaves)[:-1]])
+
+        trees = []
+        for n_int, n_leaf, i_start, l_start in zip(self.tree_internal, self.tree_leaves,
+                                                  internal_start, leaf_start):
+            n = int(n_int + n_leaf)
+
+            def local(children):
+                children = children.astype(np.int64)
+                return np.where(children < self.n_internal, children - i_start, n_int + children - l_start)
+
+            internal = slice(i_start, i_start + n_int)
+            nodes = np.zeros(n, dtype=NODE_DTYPE)
+            nodes['left_child'][n_int:] = TREE_LEAF
+            nodes['right_child'][n_int:] = TREE_LEAF
+            nodes['feature'][n_int:] = TREE_UNDEFINED
+            nodes['threshold'][n_int:] = TREE_UNDEFINED
+            nodes['left_child'][:n_int] = local(self.left[internal])
+            nodes['right_child'][:n_int] = local(self.right[internal])
+            nodes['feature'][:n_int] = self.feature[internal]
+            nodes['threshold'][:n_int] = self.threshold[internal]
+            # Sin impurezas ni conteos: no hacen falta para predecir
+            nodes['n_node_samples'] = 1
+            nodes['weighted_n_node_samples'] = 1.0
+
+            values = np.zeros((n, 1, len(self.classes_)), dtype=np.float64)
+            values[n_int:, 0, :] = self.leaf_value[l_start - self.n_internal:l_start - self.n_internal + n_leaf]
+
+            tree = Tree(self.n_features, n_classes, 1)
+            tree.__setstate__({'max_depth': self.max_depth, 'node_count': n, 'nodes': nodes, 'values': values})
+            trees.append(tree)
+        return trees
+
+    def _leaves(self, X):
+        """Índice de la hoja alcanzada en cada árbol: (filas, árboles)"""
+        flat = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(X.shape[0], dtype=np.intp) * X.shape[1])[:, np.newaxis]
+        nodes = np.repeat(self._roots[np.newaxis, :], X.shape[0], axis=0)
+        for _ in range(self.max_depth):
+            go_right = ~(flat[row_offsets + self._feature[nodes]] <= self._threshold[nodes])
+            nodes = self._children[2 * nodes + go_right]
+        return nodes
+
+    def predict_proba(self, X):
+        """Promedio de las probabilidades de hoja de todos los árboles"""
+        if X.shape[1] != self.n_features:
+            raise ValueError(f'X tiene {X.shape[1]} columnas; el bosque espera {self.n_features}')
+        out = np.empty((X.shape[0], self.leaf_value.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            block = block.toarray() if sparse.issparse(block) else np.asarray(block)
+            # Misma conversión que sklearn antes de comparar con los umbrales
+            block = block.astype(np.float32, copy=False)
+            leaves = self._leaves(block) - self.n_internal
+            out[start:start + len(block)] = self.leaf_value[leaves].mean(axis=1)
+        return out
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
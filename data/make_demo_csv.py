@@ -1,23 +1,40 @@
+import argparse
 import pandas as pd
-from random import randint, choice, random
-now = pd.Timestamp.now()
-rows = []
-labels = ['Bajo éxito','Medio éxito','Alto éxito']
-for i in range(200):
-    desc = choice([
-        'Prototipo funcional, primeras ventas a clientes locales',
-        'Idea en validación, sin ventas todavía',
-        'Modelo de negocio definido, equipo pequeño, buscando inversión',
-        'Producto en fase de pruebas con usuarios, pocas métricas'
-    ])
-    progress = randint(0,100)
-    created = (now - pd.Timedelta(days=randint(1,800))).isoformat()
-    # synthetic label heuristic
-    score = (progress/100) + (1 if 'venta' in desc or 'ventas' in desc else 0)
-    if score > 1.2: lab = 'Alto éxito'
-    elif score > 0.6: lab = 'Medio éxito'
-    else: lab = 'Bajo éxito'
-    rows.append({'description':desc, 'progress':progress, 'created_at':created, 'outcome': lab})
-df = pd.DataFrame(rows)
-df.to_csv('data/success_training.csv', index=False)
-print('CSV creado en data/success_training.csv')
\ No newline at end of file
+from random import Random
+
+DESCRIPTIONS = [
+    'Prototipo funcional, primeras ventas a clientes locales',
+    'Idea en validación, sin ventas todavía',
+    'Modelo de negocio definido, equipo pequeño, buscando inversión',
+    'Producto en fase de pruebas con usuarios, pocas métricas'
+]
+LABELS = ['Bajo éxito', 'Medio éxito', 'Alto éxito']
+
+
+def make_demo_dataframe(n_rows=200, seed=None, now=None):
+    """Genera n_rows proyectos sintéticos con la heurística de etiquetas del demo"""
+    rng = Random(seed)
+    now = now if now is not None else pd.Timestamp.now()
+    rows = []
+    for i in range(n_rows):
+        desc = rng.choice(DESCRIPTIONS)
+        progress = rng.randint(0, 100)
+        created = (now - pd.Timedelta(days=rng.randint(1, 800))).isoformat()
+        # synthetic label heuristic
+        score = (progress/100) + (1 if 'venta' in desc or 'ventas' in desc else 0)
+        if score > 1.2: lab = 'Alto éxito'
+        elif score > 0.6: lab = 'Medio éxito'
+        else: lab = 'Bajo éxito'
+        rows.append({'description':desc, 'progress':progress, 'created_at':created, 'outcome': lab})
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genera un CSV de entrenamiento sintético')
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default='data/success_training.csv')
+    args = parser.parse_args()
+    df = make_demo_dataframe(args.rows, args.seed)
+    df.to_csv(args.output, index=False)
+    print(f'CSV creado en {args.output}')
@@ -0,0 +1,30 @@
+# Configuración de gunicorn: gunicorn -c gunicorn.conf.py app:app
+
+# Cargar la app (y el modelo) en el proceso maestro antes del fork: los arrays
+# de los árboles viven en memoria C que los workers solo leen, así que quedan
+# compartidos copy-on-write en lugar de duplicarse en cada worker.
+# Limitación: solo vale para el modelo que cargó el maestro. Tras un
+# reentrenamiento o rollback cada worker recarga su propia copia privada (el
+# mmap del artefacto no lo evita: los árboles se reconstruyen al cargar), y
+# un HUP no alcanza porque los workers nuevos heredan el modelo viejo del
+# maestro. Para volver a compartirlo hay que reiniciar gunicorn.
+preload_app = True
+
+
+def when_ready(server):
+    """Carga el modelo de éxito en el maestro antes de crear los workers"""
+    try:
+        from ml_service import warm_up
+        warm_up()
+    except Exception as e:
+        server.log.warning(f"No se pudo precargar el modelo: {e}")
+
+
+def post_worker_init(worker):
+    """Calienta el modelo en cada worker antes de que acepte requests"""
+    try:
+        from ml_service import warm_up
+        version = warm_up()
+        worker.log.info(f"Modelo listo en el worker {worker.pid}: {version}")
+    except Exception as e:
+        worker.log.warning(f"No se pudo calentar el modelo: {e}")
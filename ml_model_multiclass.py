@@ -1,21 +1,135 @@
 import os
+import sys
+import re
+import copy
+import time
+import json
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+import unicodedata
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 import joblib
 import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.impute import SimpleImputer
-from datetime import datetime
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier, LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+from sklearn.metrics import f1_score
+from scipy import sparse
+from scipy.optimize import minimize_scalar
+from scipy.special import log_softmax
+from datetime import datetime, date, timezone
+from threadpoolctl import ThreadpoolController
+import model_registry
+from compiled_forest import CompiledForest
 
-MODEL_DIR = os.path.join('models')
-MODEL_PATH = os.path.join(MODEL_DIR, 'success_multiclass.joblib')
+MODEL_DIR = model_registry.MODEL_DIR
+MODEL_PATH = model_registry.DEFAULT_MODEL_PATH
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# Modo de memory-mapping al cargar el artefacto ('r' = solo lectura; vacío =
+# copia privada). Con el artefacto compacto solo quedan mapeados los arrays
+# del bosque compilado, el idf_ y las estadísticas numéricas (~7% del modelo
+# cargado): los árboles de sklearn se reconstruyen en memoria privada de cada
+# proceso, así que el ahorro real es mínimo (PSS 51.6 MB con mmap vs 50.7 MB sin él)
+MODEL_MMAP_MODE = os.environ.get('ML_MODEL_MMAP', 'r') or None
+
+# Hilos de inferencia. El bosque se guarda con n_jobs=-1 (para entrenar), pero
+# en un worker web una predicción suelta no debe repartirse en todos los núcleos:
+# con varios workers eso satura la CPU. Los lotes grandes sí usan varios hilos.
+INFERENCE_THREADS = max(1, int(os.environ.get('ML_INFERENCE_THREADS', 1)))
+BATCH_THREADS = max(1, int(os.environ.get('ML_BATCH_THREADS', os.cpu_count() or 1)))
+# Filas a partir de las cuales una llamada se considera lote
+BATCH_MIN_ROWS = max(1, int(os.environ.get('ML_BATCH_MIN_ROWS', 256)))
+
+# Límite de modelos residentes por worker (global + cohortes + sandboxes).
+# ML_MAX_RESIDENT_MB se compara con la memoria estimada de cada modelo cargado
+# (_model_footprint: árboles expandidos, bosque compilado y vocabulario), que
+# es del orden de 8-9 veces el tamaño del artefacto compacto en disco.
+MAX_RESIDENT_MODELS = max(1, int(os.environ.get('ML_MAX_RESIDENT_MODELS', 8)))
+MAX_RESIDENT_BYTES = int(float(os.environ.get('ML_MAX_RESIDENT_MB', 512)) * 1024 * 1024)
+# Versiones que conserva el registro de cada cohorte/sandbox
+SCOPE_KEEP_VERSIONS = max(1, int(os.environ.get('ML_SCOPE_KEEP_VERSIONS', 3)))
+
+# Filas por bloque al puntuar un CSV completo (score_csv)
+SCORING_CHUNK_SIZE = int(os.environ.get('ML_SCORING_CHUNK_SIZE', 2000))
+
+# Motor de inferencia: 'sklearn' (pipeline completo) o 'compiled' (bosque
+# aplanado en arrays, ver compiled_forest.py). El compilado se usa en llamadas
+# de menos de BATCH_MIN_ROWS filas; los lotes grandes rinden más con sklearn
+# en varios hilos. Los artefactos compactos (ver compact_pipeline) ya traen el
+# bosque compilado; los anteriores se compilan al cargar.
+INFERENCE_ENGINES = ('sklearn', 'compiled')
+INFERENCE_ENGINE = os.environ.get('ML_INFERENCE_ENGINE', 'sklearn')
+
 NUMERIC_FEATURES = ['desc_len', 'word_count', 'num_keywords', 'progress', 'days_since_creation']
 
+# Columnas numéricas que genera _make_features y consume el pipeline
+MODEL_FEATURES = ['desc_len', 'word_count', 'num_keywords', 'progress', 'progress_squared',
+                  'days_since_creation', 'high_keywords', 'medium_keywords', 'low_keywords',
+                  'has_numbers', 'has_percentage', 'has_money', 'is_high_progress', 
+                  'is_medium_progress', 'is_low_progress', 'is_new', 'is_mature',
+                  'high_success_score', 'low_success_score']
+
+# Entrenamiento por bloques: modo por defecto ('batch', 'streaming', 'select' o 'auto')
+# y tamaño de archivo a partir del cual 'auto' elige streaming
+TRAINING_MODE = os.environ.get('ML_TRAINING_MODE', 'auto')
+STREAMING_THRESHOLD_BYTES = int(os.environ.get('ML_STREAMING_THRESHOLD_BYTES', 100 * 1024 * 1024))
+STREAMING_CHUNK_SIZE = 10000
+# Holdout del modo streaming para calibrar las probabilidades (filas que no se
+# usan para entrenar): una fracción del dataset, acotada entre un mínimo y un máximo
+STREAMING_HOLDOUT_FRACTION = 0.05
+STREAMING_HOLDOUT_MIN_ROWS = 200
+STREAMING_HOLDOUT_MAX_ROWS = 20000
+
+# Perfiles de build_pipeline, del más preciso al más rápido. 'accurate' es el
+# bosque de producción; los otros achican bosque y vocabulario para bajar la
+# latencia y el tamaño del artefacto.
+PIPELINE_PROFILES = {
+    'accurate': {'n_estimators': 200, 'max_depth': 15, 'ngram_range': (1, 3), 'max_features': 3000},
+    'balanced': {'n_estimators': 100, 'max_depth': 12, 'ngram_range': (1, 2), 'max_features': 2000},
+    'fast': {'n_estimators': 40, 'max_depth': 10, 'ngram_range': (1, 2), 'max_features': 1000},
+}
+DEFAULT_PROFILE = 'accurate'
+_PIPELINE_DEFAULTS = {'classifier': 'forest', 'C': 1.0, **PIPELINE_PROFILES[DEFAULT_PROFILE]}
+# Objetivos por defecto para elegir perfil al entrenar (sin definir = 'accurate')
+TARGET_P99_MS = float(os.environ['ML_TARGET_P99_MS']) if os.environ.get('ML_TARGET_P99_MS') else None
+MAX_ARTIFACT_BYTES = (int(float(os.environ['ML_MAX_ARTIFACT_MB']) * 1024 * 1024)
+                      if os.environ.get('ML_MAX_ARTIFACT_MB') else None)
+
+# Selección de modelo (mode='select'): presupuesto de tiempo, folds y procesos
+SELECTION_TIME_BUDGET = float(os.environ.get('ML_SELECTION_TIME_BUDGET', 300))
+SELECTION_FOLDS = int(os.environ.get('ML_SELECTION_FOLDS', 5))
+SELECTION_WORKERS = max(1, int(os.environ.get('ML_SELECTION_WORKERS', os.cpu_count() or 1)))
+# Un candidato se descarta si su F1 medio queda más de este margen por debajo
+# del mejor, ambos con al menos SELECTION_MIN_FOLDS folds evaluados
+SELECTION_ELIMINATION_MARGIN = 0.03
+SELECTION_MIN_FOLDS = 2
+# Candidatos: variantes del bosque y una alternativa lineal barata
+SELECTION_GRID = [
+    {'classifier': 'forest', 'n_estimators': 200, 'max_depth': 15, 'ngram_range': (1, 3), 'max_features': 3000},
+    {'classifier': 'forest', 'n_estimators': 100, 'max_depth': 10, 'ngram_range': (1, 2), 'max_features': 2000},
+    {'classifier': 'forest', 'n_estimators': 300, 'max_depth': 25, 'ngram_range': (1, 3), 'max_features': 5000},
+    {'classifier': 'forest', 'n_estimators': 50, 'max_depth': 8, 'ngram_range': (1, 1), 'max_features': 1000},
+    {'classifier': 'linear', 'C': 1.0, 'ngram_range': (1, 2), 'max_features': 5000},
+    {'classifier': 'linear', 'C': 4.0, 'ngram_range': (1, 3), 'max_features': 3000},
+]
+# Proyectos usados para medir la latencia de una predicción del modelo elegido
+LATENCY_SAMPLES = 100
+
 # Keywords expandidos y ponderados por importancia
 HIGH_SUCCESS_KEYWORDS = ['clientes activos', 'ingresos recurrentes', 'usuarios', 'ventas', 'revenue', 'mrr', 
                          'funding', 'inversión', 'crecimiento', 'empleados', 'equipo', 'escalamiento', 
@@ -30,8 +144,124 @@ LOW_SUCCESS_KEYWORDS = ['idea', 'concepto', 'inicial', 'exploración', 'investig
 
 CLASS_NAMES = ['Bajo éxito', 'Medio éxito', 'Alto éxito']
 
-def _make_features(df):
-    """Genera características mejoradas con mejor extracción de señales"""
+# Etiquetas de outcome aceptadas (minúsculas, sin acentos) -> índice de clase
+OUTCOME_LABELS = {
+    'bajo': 0, 'medio': 1, 'alto': 2,
+    'bajo exito': 0, 'medio exito': 1, 'alto exito': 2,
+    'bajo_exito': 0, 'medio_exito': 1, 'alto_exito': 2,
+    '0': 0, '1': 1, '2': 2
+}
+# Clase asignada por _map_target a las etiquetas que no reconoce
+DEFAULT_OUTCOME = 1
+
+# Límites de los CSV de entrenamiento subidos (validate_training_csv); el de
+# tamaño es un límite HTTP y lo pasa app.py
+MAX_TRAINING_ROWS = int(os.environ.get('ML_MAX_TRAINING_ROWS', 200000))
+MAX_EMPTY_DESCRIPTION_RATE = 0.5
+VALIDATION_CHUNK_SIZE = 50000
+
+# Extensión de los snapshots de entrenamiento (write_training_snapshot)
+SNAPSHOT_EXTENSION = '.npz'
+
+
+class _KeywordMatcher:
+    """Cuenta keywords ponderadas por categoría de forma vectorizada.
+
+    Se construye una sola vez: cada keyword es una fila de la matriz de pesos
+    (una columna por categoría), así la presencia de todas las keywords en
+    todas las descripciones se reduce con un único producto matricial.
+    """
+
+    def __init__(self, groups):
+        self.keywords = list(dict.fromkeys(kw for kws, _ in groups for kw in kws))
+        index = {kw: i for i, kw in enumerate(self.keywords)}
+        self.weights = np.zeros((len(self.keywords), len(groups)), dtype=np.int64)
+        for col, (kws, weight) in enumerate(groups):
+            for kw in kws:
+                self.weights[index[kw], col] += weight
+
+    # Bytes máximos del array de ancho fijo de cada bloque (ver count)
+    BLOCK_BYTES = 32 * 1024 * 1024
+
+    def count(self, texts_lower):
+        """Devuelve una matriz (n_textos, n_categorías) con los puntajes.
+
+        np.strings.find necesita un array de ancho fijo (UTF-32): cada fila
+        ocupa lo que la más larga del array. Para que una descripción enorme
+        no infle todas las demás, las filas se ordenan por largo y se procesan
+        en bloques de a lo sumo BLOCK_BYTES. (StringDType, de ancho variable,
+        es varias veces más lento en find.)
+        """
+        texts = list(texts_lower)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        order = np.argsort(lengths, kind='stable')
+        scores = np.empty((len(texts), self.weights.shape[1]), dtype=np.int64)
+        start = 0
+        while start < len(texts):
+            end = len(texts)
+            # Ordenadas por largo: el ancho del bloque es el de su última fila
+            while end - start > 1 and (end - start) * max(int(lengths[order[end - 1]]), 1) * 4 > self.BLOCK_BYTES:
+                end = start + max(1, self.BLOCK_BYTES // (4 * max(int(lengths[order[end - 1]]), 1)))
+            rows = order[start:end]
+            block = np.asarray([texts[i] for i in rows], dtype=str)
+            present = np.empty((len(block), len(self.keywords)), dtype=np.int64)
+            for i, kw in enumerate(self.keywords):
+                present[:, i] = np.strings.find(block, kw) >= 0
+            scores[rows] = present @ self.weights
+            start = end
+        return scores
+
+
+_KEYWORD_MATCHER = _KeywordMatcher([
+    (HIGH_SUCCESS_KEYWORDS, 2),
+    (MEDIUM_SUCCESS_KEYWORDS, 1),
+    (LOW_SUCCESS_KEYWORDS, 1),
+])
+
+# Señales de texto (compartidas por _make_features y _project_features)
+NUMBER_PATTERN = r'\d+'
+PERCENTAGE_PATTERN = r'%|\d+\s*por\s*ciento'
+MONEY_PATTERN = r'\$|USD|pesos|dólares|ingresos'
+_NUMBER_RE = re.compile(NUMBER_PATTERN)
+_PERCENTAGE_RE = re.compile(PERCENTAGE_PATTERN)
+_MONEY_RE = re.compile(MONEY_PATTERN)
+
+# Fechas ISO que datetime.fromisoformat interpreta igual que pandas; el resto
+# (y las fuera del rango de pd.Timestamp) pasan por _days_since
+_ISO_DATE_RE = re.compile(
+    r'^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?)?(Z|[+-]\d{2}:\d{2})?$'
+)
+_MIN_YEAR, _MAX_YEAR = pd.Timestamp.min.year + 1, pd.Timestamp.max.year - 1
+
+
+def _reference_timestamp(reference_time=None):
+    """Normaliza el instante de referencia a un Timestamp sin zona horaria"""
+    ref = pd.Timestamp.now() if reference_time is None else pd.Timestamp(reference_time)
+    if ref.tzinfo is not None:
+        ref = ref.tz_convert('UTC').tz_localize(None)
+    return ref
+
+
+def _parse_created_series(created_at):
+    """Fechas de creación como datetime64 sin zona (UTC); NaT si faltan o no se entienden"""
+    created = created_at.where(~created_at.isin(['', 'None']))
+    # Una sola pasada; las fechas con zona horaria se llevan a UTC
+    return pd.to_datetime(created, errors='coerce', format='mixed', utc=True).dt.tz_localize(None)
+
+
+def _days_since(created_at, reference_time=None):
+    """Días transcurridos desde created_at hasta la referencia (30 si no hay fecha válida)"""
+    ref = _reference_timestamp(reference_time)
+    days = (ref - _parse_created_series(created_at)).dt.days
+    return days.fillna(30).clip(lower=0).astype(int)  # Default: 1 mes, no negativos
+
+
+def _make_features(df, reference_time=None):
+    """Genera características mejoradas con mejor extracción de señales.
+
+    reference_time fija el "ahora" usado para la antigüedad del proyecto;
+    si es None se usa el instante actual.
+    """
     df = df.copy()
     
     # Manejar descripción
@@ -39,27 +269,22 @@ def _make_features(df):
     df['description_lower'] = df['description'].str.lower()
     
     # Características básicas de texto
-    df['desc_len'] = df['description'].apply(len)
-    df['word_count'] = df['description'].apply(lambda t: len(str(t).split()))
+    df['desc_len'] = df['description'].str.len()
+    df['word_count'] = df['description'].str.split().str.len()
     
     # Conteo de keywords ponderados por categoría
-    df['high_keywords'] = df['description_lower'].apply(
-        lambda t: sum(2 if keyword in t else 0 for keyword in HIGH_SUCCESS_KEYWORDS)
-    )
-    df['medium_keywords'] = df['description_lower'].apply(
-        lambda t: sum(1 if keyword in t else 0 for keyword in MEDIUM_SUCCESS_KEYWORDS)
-    )
-    df['low_keywords'] = df['description_lower'].apply(
-        lambda t: sum(1 if keyword in t else 0 for keyword in LOW_SUCCESS_KEYWORDS)
-    )
+    keyword_scores = _KEYWORD_MATCHER.count(df['description_lower'])
+    df['high_keywords'] = keyword_scores[:, 0]
+    df['medium_keywords'] = keyword_scores[:, 1]
+    df['low_keywords'] = keyword_scores[:, 2]
     
     # Score combinado de keywords
     df['num_keywords'] = df['high_keywords'] * 3 + df['medium_keywords'] * 2 + df['low_keywords']
     
     # Características numéricas indicativas
-    df['has_numbers'] = df['description'].str.contains(r'\d+', regex=True).astype(int)
-    df['has_percentage'] = df['description'].str.contains(r'%|\d+\s*por\s*ciento', regex=True).astype(int)
-    df['has_money'] = df['description'].str.contains(r'\$|USD|pesos|dólares|ingresos', regex=True).astype(int)
+    df['has_numbers'] = df['description'].str.contains(NUMBER_PATTERN, regex=True).astype(int)
+    df['has_percentage'] = df['description'].str.contains(PERCENTAGE_PATTERN, regex=True).astype(int)
+    df['has_money'] = df['description'].str.contains(MONEY_PATTERN, regex=True).astype(int)
     
     # Manejar progreso con transformación no lineal
     df['progress'] = pd.to_numeric(df.get('progress', 0), errors='coerce')
@@ -72,20 +297,8 @@ def _make_features(df):
     df['is_low_progress'] = (df['progress'] < 40).astype(int)
     
     # Manejar fecha de creación
-    def days_since(s):
-        try:
-            if pd.isna(s) or s == '' or s == 'None':
-                return 30  # Default: 1 mes
-            d = pd.to_datetime(s, errors='coerce')
-            if pd.isna(d):
-                return 30
-            days = (pd.Timestamp.now() - d).days
-            return max(0, days)  # No negativos
-        except Exception:
-            return 30
-    
     if 'created_at' in df.columns:
-        df['days_since_creation'] = df['created_at'].apply(days_since)
+        df['days_since_creation'] = _days_since(df['created_at'], reference_time)
     else:
         df['days_since_creation'] = 30
     
@@ -109,11 +322,7 @@ def _make_features(df):
     )
     
     # Limpiar NaN
-    numeric_cols = ['desc_len', 'word_count', 'num_keywords', 'progress', 'progress_squared',
-                    'days_since_creation', 'high_keywords', 'medium_keywords', 'low_keywords',
-                    'has_numbers', 'has_percentage', 'has_money', 'is_high_progress', 
-                    'is_medium_progress', 'is_low_progress', 'is_new', 'is_mature',
-                    'high_success_score', 'low_success_score']
+    numeric_cols = MODEL_FEATURES
     
     for col in numeric_cols:
         if col in df.columns:
@@ -122,18 +331,144 @@ def _make_features(df):
     features = df[['description'] + numeric_cols].copy()
     return features
 
-def build_pipeline():
-    """Construye pipeline con Random Forest para mejor captura de patrones no lineales"""
-    numeric_features = ['desc_len', 'word_count', 'num_keywords', 'progress', 'progress_squared',
-                       'days_since_creation', 'high_keywords', 'medium_keywords', 'low_keywords',
-                       'has_numbers', 'has_percentage', 'has_money', 'is_high_progress', 
-                       'is_medium_progress', 'is_low_progress', 'is_new', 'is_mature',
-                       'high_success_score', 'low_success_score']
+def _parse_created_at(value):
+    """datetime sin zona (UTC) para los formatos comunes, None si falta o Ellipsis si hay que usar pandas"""
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return None
+    if isinstance(value, datetime):
+        created = value
+    elif isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    elif isinstance(value, str):
+        if value in ('', 'None'):
+            return None
+        if not _ISO_DATE_RE.match(value):
+            return Ellipsis
+        created = datetime.fromisoformat(value)
+    else:
+        return Ellipsis
+    if created.tzinfo is not None:
+        created = created.astimezone(timezone.utc).replace(tzinfo=None)
+    if not _MIN_YEAR <= created.year <= _MAX_YEAR:
+        return Ellipsis
+    return created
+
+
+def _project_days(created_at, ref):
+    """Versión escalar de _days_since para un valor (ref: Timestamp de _reference_timestamp)"""
+    created = _parse_created_at(created_at)
+    if created is Ellipsis:
+        return int(_days_since(pd.Series([created_at], dtype=object), ref).iloc[0])
+    if created is None:
+        return 30
+    return max((ref.to_pydatetime(warn=False) - created).days, 0)
+
+
+def _project_progress(value):
+    """Progreso como en _make_features: numérico, NaN a 0 y recortado a [0, 100]"""
+    if isinstance(value, str):
+        # Mismo parser que pd.to_numeric sobre la columna
+        value = pd.to_numeric(value, errors='coerce')
+    try:
+        progress = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if np.isnan(progress):
+        return 0.0
+    return min(max(progress, 0.0), 100.0)
+
+
+# Pesos de keywords por categoría para el camino escalar: [(keyword, (alto, medio, bajo))]
+_KEYWORD_WEIGHTS = [(kw, tuple(int(w) for w in row))
+                    for kw, row in zip(_KEYWORD_MATCHER.keywords, _KEYWORD_MATCHER.weights)]
+
+
+def _project_features(project_dict, ref):
+    """Features de un proyecto sin pandas; mismos valores que _make_features.
+
+    Devuelve una lista alineada con ['description'] + MODEL_FEATURES.
+    ref: Timestamp de _reference_timestamp.
+    """
+    description = project_dict.get('description', '')
+    if description is None or description is pd.NA or (isinstance(description, float) and np.isnan(description)):
+        description = ''
+    description = str(description)
+    lower = description.lower()
+
+    high = medium = low = 0
+    for kw, (w_high, w_medium, w_low) in _KEYWORD_WEIGHTS:
+        if kw in lower:
+            high += w_high
+            medium += w_medium
+            low += w_low
+
+    has_numbers = int(_NUMBER_RE.search(description) is not None)
+    has_percentage = int(_PERCENTAGE_RE.search(description) is not None)
+    has_money = int(_MONEY_RE.search(description) is not None)
+
+    progress = _project_progress(project_dict.get('progress', 0))
+    is_high_progress = int(progress >= 70)
+    is_medium_progress = int(40 <= progress < 70)
+    is_low_progress = int(progress < 40)
+
+    days = _project_days(project_dict['created_at'], ref) if 'created_at' in project_dict else 30
+    is_new = int(days <= 30)
+    is_mature = int(days >= 90)
+
+    # Mismo orden que MODEL_FEATURES
+    return [
+        description,
+        len(description),
+        len(description.split()),
+        high * 3 + medium * 2 + low,
+        progress,
+        progress ** 2,
+        days,
+        high,
+        medium,
+        low,
+        has_numbers,
+        has_percentage,
+        has_money,
+        is_high_progress,
+        is_medium_progress,
+        is_low_progress,
+        is_new,
+        is_mature,
+        high * 3 + is_high_progress * 2 + has_money * 2 + has_numbers + is_mature,
+        low * 2 + is_low_progress * 2 + is_new
+    ]
+
+
+def _features_frame(rows):
+    """DataFrame de entrada del pipeline a partir de filas de _project_features"""
+    return pd.DataFrame(rows, columns=['description'] + MODEL_FEATURES)
+
+
+def build_pipeline(profile=DEFAULT_PROFILE, **params):
+    """Construye pipeline con Random Forest para mejor captura de patrones no lineales.
+
+    profile elige los parámetros base de PIPELINE_PROFILES ('fast', 'balanced'
+    o 'accurate'); los params explícitos (n_estimators, max_depth,
+    ngram_range, max_features, classifier, C) los reemplazan.
+    classifier='linear' usa una regresión logística (C) sobre las mismas
+    features: más barata de entrenar y de predecir.
+    """
+    if profile not in PIPELINE_PROFILES:
+        raise ValueError(f"Perfil desconocido: '{profile}'")
+    unknown = set(params) - set(_PIPELINE_DEFAULTS)
+    if unknown:
+        raise TypeError(f"Parámetros de pipeline desconocidos: {', '.join(sorted(unknown))}")
+    settings = {**_PIPELINE_DEFAULTS, **PIPELINE_PROFILES[profile], **params}
+    classifier, C = settings['classifier'], settings['C']
+    n_estimators, max_depth = settings['n_estimators'], settings['max_depth']
+    ngram_range, max_features = settings['ngram_range'], settings['max_features']
+    numeric_features = MODEL_FEATURES
     
     pre = ColumnTransformer([
         ('tfidf', TfidfVectorizer(
-            max_features=3000, 
-            ngram_range=(1,3),  # Trigramas para captar frases
+            max_features=max_features, 
+            ngram_range=tuple(ngram_range),  # Trigramas para captar frases
             min_df=1,
             max_df=0.95,
             sublinear_tf=True
@@ -144,12 +479,20 @@ def build_pipeline():
         ]), numeric_features)
     ], remainder='drop')
     
+    if classifier == 'linear':
+        return Pipeline([
+            ('pre', pre),
+            ('clf', LogisticRegression(C=C, class_weight='balanced', max_iter=2000, random_state=42))
+        ])
+    if classifier != 'forest':
+        raise ValueError(f"Clasificador desconocido: '{classifier}'")
+    
     # Random Forest es mejor para datos desbalanceados y captura interacciones
     pipe = Pipeline([
         ('pre', pre),
         ('clf', RandomForestClassifier(
-            n_estimators=200,
-            max_depth=15,
+            n_estimators=n_estimators,
+            max_depth=max_depth,
             min_samples_split=3,
             min_samples_leaf=2,
             class_weight='balanced',  # Maneja clases desbalanceadas
@@ -159,44 +502,420 @@ def build_pipeline():
     ])
     return pipe
 
+class CompactTfidfVectorizer(TfidfVectorizer):
+    """TfidfVectorizer que se serializa compacto.
+
+    No guarda stop_words_ (todos los n-gramas descartados por max_features /
+    min_df / max_df, solo sirve para inspección) y guarda el vocabulario como
+    un blob UTF-8 con offsets en lugar de un dict de Python. El dict se
+    reconstruye al cargar.
+    """
+
+    def __getstate__(self):
+        state = dict(super().__getstate__())
+        state.pop('stop_words_', None)
+        vocabulary = state.get('vocabulary_')
+        if vocabulary and sorted(vocabulary.values()) == list(range(len(vocabulary))):
+            terms = sorted(vocabulary, key=vocabulary.get)
+            encoded = [term.encode('utf-8') for term in terms]
+            offsets = np.cumsum([0] + [len(e) for e in encoded])
+            del state['vocabulary_']
+            state['_vocabulary_blob'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+            state['_vocabulary_offsets'] = offsets.astype(np.uint32 if offsets[-1] < 2**32 else np.uint64)
+        return state
+
+    def __setstate__(self, state):
+        blob = state.pop('_vocabulary_blob', None)
+        offsets = state.pop('_vocabulary_offsets', None)
+        super().__setstate__(state)
+        if blob is not None:
+            data = blob.tobytes()
+            bounds = offsets.tolist()
+            self.vocabulary_ = {data[a:b].decode('utf-8'): i for i, (a, b) in enumerate(zip(bounds, bounds[1:]))}
+
+
+class CompactRandomForestClassifier(RandomForestClassifier):
+    """RandomForestClassifier que se serializa como CompiledForest.
+
+    El artefacto guarda solo lo necesario para predecir, en tipos mínimos;
+    al cargar se reconstruyen los árboles de sklearn y el bosque compilado
+    queda disponible para el motor 'compiled'. Se pierden impurezas y conteos
+    por nodo (feature_importances_), que la app no usa.
+    """
+
+    def __getstate__(self):
+        state = dict(super().__getstate__())
+        if state.get('estimators_'):
+            state['compiled_forest_'] = state.get('compiled_forest_') or CompiledForest.from_estimator(self)
+            del state['estimators_']
+        return state
+
+    def __copy__(self):
+        # copy.copy no pasa por __getstate__/__setstate__: la copia comparte
+        # los árboles (como la de un RandomForestClassifier común) en lugar de
+        # reconstruirlos desde el bosque compilado (ver _pipeline_with_threads)
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        return new
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if 'compiled_forest_' in state and 'estimators_' not in state:
+            self.estimators_ = [self._tree_estimator(tree) for tree in self.compiled_forest_.to_trees()]
+
+    def _tree_estimator(self, tree):
+        estimator = copy.copy(self.estimator_)
+        estimator.set_params(**{p: getattr(self, p) for p in self.estimator_params})
+        estimator.tree_ = tree
+        estimator.n_features_in_ = self.n_features_in_
+        estimator.n_outputs_ = self.n_outputs_
+        estimator.classes_ = self.classes_
+        estimator.n_classes_ = self.n_classes_
+        return estimator
+
+
+def _iter_estimators(estimator):
+    """Recorre un estimador y sus sub-estimadores ajustados (Pipeline, ColumnTransformer)"""
+    yield estimator
+    if isinstance(estimator, Pipeline):
+        for _, step in estimator.steps:
+            yield from _iter_estimators(step)
+    elif isinstance(estimator, ColumnTransformer):
+        for _, transformer, _ in getattr(estimator, 'transformers_', []):
+            if not isinstance(transformer, str):
+                yield from _iter_estimators(transformer)
+
+
+def compact_pipeline(pipe):
+    """Paso posterior al fit: pasa los estimadores a sus variantes compactas.
+
+    Cambia la clase de los TfidfVectorizer y RandomForestClassifier ajustados
+    (mismo estado, solo cambia cómo se serializan) y descarta stop_words_.
+    Devuelve estadísticas para el reporte de entrenamiento.
+    """
+    stats = {'stop_words_removed': 0, 'vocabulary_terms': 0, 'forest_nodes': 0}
+    for est in _iter_estimators(pipe):
+        if type(est) is TfidfVectorizer:
+            stats['stop_words_removed'] += len(est.__dict__.pop('stop_words_', None) or ())
+            stats['vocabulary_terms'] += len(est.vocabulary_)
+            est.__class__ = CompactTfidfVectorizer
+        elif type(est) is RandomForestClassifier:
+            est.__class__ = CompactRandomForestClassifier
+            est.compiled_forest_ = CompiledForest.from_estimator(est)
+            stats['forest_nodes'] += est.compiled_forest_.node_count
+    return stats
+
+
+def _normalize_labels(labels):
+    """Etiquetas de outcome en minúsculas, sin espacios extremos ni acentos"""
+    labels = labels.astype(str).str.lower().str.strip()
+    return labels.str.normalize('NFKD').str.encode('ascii', errors='ignore').str.decode('utf-8')
+
+
+def outcome_index(label):
+    """Índice de clase de una etiqueta de outcome, o None si no la reconoce (ver _outcome_indices)"""
+    text = unicodedata.normalize('NFKD', str(label).lower().strip()).encode('ascii', errors='ignore').decode('utf-8')
+    index = OUTCOME_LABELS.get(text)
+    if index is None:
+        try:
+            value = float(text)
+        except ValueError:
+            return None
+        if value.is_integer() and 0 <= value < len(CLASS_NAMES):
+            index = int(value)
+    return index
+
+
+def _outcome_indices(labels):
+    """Índice de clase de cada etiqueta de outcome, NaN si no la reconoce.
+
+    Acepta las etiquetas de OUTCOME_LABELS y los índices 0..2 escritos como
+    número o texto ("1", "1.0"). validate_training_csv y _map_target usan
+    esta misma regla.
+    """
+    numeric = pd.to_numeric(labels, errors='coerce')
+    if labels.dtype != object and labels.dtype != 'string':
+        # Columna ya numérica (snapshot, CSV con 0/1/2): no hay etiquetas de texto
+        mapped = pd.Series(np.nan, index=labels.index)
+    else:
+        mapped = _normalize_labels(labels).map(OUTCOME_LABELS).astype(float)
+    valid = (numeric % 1 == 0) & numeric.between(0, len(CLASS_NAMES) - 1)
+    return mapped.fillna(numeric.where(valid))
+
+
 def _map_target(y):
     """Mapea etiquetas de outcome a índices numéricos"""
-    if y.dtype == object or y.dtype == 'string':
-        mapping = {
-            'bajo': 0, 'medio': 1, 'alto': 2,
-            'bajo exito': 0, 'medio exito': 1, 'alto exito': 2,
-            'bajo éxito': 0, 'medio éxito': 1, 'alto éxito': 2,
-            'bajo_exito': 0, 'medio_exito': 1, 'alto_exito': 2,
-            '0': 0, '1': 1, '2': 2,
-            0: 0, 1: 1, 2: 2
-        }
-        
-        y_clean = y.astype(str).str.lower().str.strip()
-        # Remover acentos
-        y_clean = y_clean.str.normalize('NFKD').str.encode('ascii', errors='ignore').str.decode('utf-8')
-        mapped = y_clean.map(mapping)
-        
-        # Default a medio éxito si no encuentra
-        mapped = mapped.fillna(1).astype(int)
-        return mapped
+    # Default a medio éxito si no encuentra
+    return _outcome_indices(y).fillna(DEFAULT_OUTCOME).astype(int)
+
+
+def validate_training_csv(csv_path, max_bytes=None, max_rows=MAX_TRAINING_ROWS,
+                          chunksize=VALIDATION_CHUNK_SIZE):
+    """Valida y perfila un CSV de entrenamiento en una sola pasada, antes de encolar el fit.
+
+    Lee por bloques solo las columnas description y outcome, como texto, y
+    corta apenas supera max_bytes o max_rows (None = sin límite). Devuelve un reporte con 'valid' y 'errors'
+    más los conteos por clase, las etiquetas que _map_target no reconoce
+    (las mandaría a la clase por defecto) y la tasa de descripciones vacías.
+    """
+    report = {
+        'valid': False,
+        'errors': [],
+        'bytes': os.path.getsize(csv_path),
+        'rows': 0,
+        'class_counts': {name: 0 for name in CLASS_NAMES},
+        'missing_outcome': 0,
+        'unmapped_labels': {},
+        'empty_descriptions': 0,
+        'empty_description_rate': 0.0
+    }
+    errors = report['errors']
+    if max_bytes is not None and report['bytes'] > max_bytes:
+        errors.append(f"El archivo pesa {report['bytes'] / 1024 / 1024:.1f} MB; "
+                      f"el máximo es {max_bytes / 1024 / 1024:.0f} MB")
+        return report
+    
+    try:
+        columns = set(pd.read_csv(csv_path, encoding='utf-8', nrows=0).columns)
+    except (ValueError, UnicodeDecodeError) as e:
+        errors.append(f'No se pudo leer el CSV: {e}')
+        return report
+    missing = [c for c in ('description', 'outcome') if c not in columns]
+    if missing:
+        errors.append(f"Faltan columnas: {', '.join(missing)}")
+        return report
+    
+    counts = np.zeros(len(CLASS_NAMES), dtype=np.int64)
+    unmapped = {}
+    try:
+        reader = pd.read_csv(csv_path, encoding='utf-8', usecols=['description', 'outcome'],
+                             dtype={'description': str, 'outcome': str}, keep_default_na=False,
+                             chunksize=chunksize)
+        for chunk in reader:
+            report['rows'] += len(chunk)
+            if max_rows is not None and report['rows'] > max_rows:
+                errors.append(f'El archivo tiene más de {max_rows} filas')
+                return report
+            
+            report['empty_descriptions'] += int((chunk['description'].str.strip() == '').sum())
+            labels = chunk['outcome'].str.strip()
+            has_label = labels != ''
+            report['missing_outcome'] += int((~has_label).sum())
+            labels = labels[has_label]
+            mapped = _outcome_indices(labels)
+            known = mapped.notna()
+            counts += np.bincount(mapped[known].astype(int), minlength=len(CLASS_NAMES))
+            for label, n in labels[~known].value_counts().items():
+                unmapped[label] = unmapped.get(label, 0) + int(n)
+    except (ValueError, UnicodeDecodeError) as e:
+        errors.append(f'No se pudo leer el CSV: {e}')
+        return report
     
-    return pd.to_numeric(y, errors='coerce').fillna(1).astype(int)
+    rows = report['rows']
+    report['class_counts'] = dict(zip(CLASS_NAMES, counts.tolist()))
+    # Las 20 etiquetas desconocidas más frecuentes alcanzan para corregir el archivo
+    report['unmapped_labels'] = dict(sorted(unmapped.items(), key=lambda item: -item[1])[:20])
+    report['empty_description_rate'] = round(report['empty_descriptions'] / rows, 4) if rows else 0.0
+    
+    if rows == 0:
+        errors.append('El archivo no tiene filas')
+    if unmapped:
+        errors.append(f'{sum(unmapped.values())} filas tienen un outcome no reconocido '
+                      f"(se aceptan {', '.join(CLASS_NAMES)} o 0/1/2)")
+    if rows and report['empty_description_rate'] > MAX_EMPTY_DESCRIPTION_RATE:
+        errors.append(f"El {report['empty_description_rate']:.0%} de las filas no tiene descripción")
+    if rows and int((counts > 0).sum()) < 2:
+        errors.append('Se necesitan ejemplos de al menos dos clases')
+    
+    report['valid'] = not errors
+    return report
+
 
-def train_model(csv_path, model_path=MODEL_PATH):
+def write_training_snapshot(chunks, path):
+    """Escribe un snapshot de entrenamiento columnar (.npz comprimido) a partir de bloques de filas.
+
+    chunks: iterable de listas de dicts con project_id, description, progress,
+    created_at y outcome (índice de clase). Las descripciones se guardan como
+    un solo blob UTF-8 más offsets en caracteres: al cargar se decodifica una
+    vez y se corta, sin parsear texto fila por fila. La escritura es atómica.
+    Devuelve un resumen.
+    """
+    ids, progress, created, outcome, blobs, lengths = [], [], [], [], [], []
+    for rows in chunks:
+        if not rows:
+            continue
+        texts = [str(row.get('description') or '') for row in rows]
+        blobs.append(''.join(texts).encode('utf-8'))
+        lengths.append(np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts)))
+        ids.append(np.array([row['project_id'] for row in rows], dtype=np.int64))
+        progress.append(pd.to_numeric(pd.Series([row.get('progress') for row in rows], dtype=object),
+                                      errors='coerce').to_numpy(dtype=np.float64))
+        created.append(pd.to_datetime(pd.Series([row.get('created_at') for row in rows], dtype=object),
+                                      errors='coerce', format='mixed').to_numpy(dtype='datetime64[s]'))
+        outcome.append(np.array([row['outcome'] for row in rows], dtype=np.int8))
+
+    lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int64)
+    outcome = np.concatenate(outcome) if outcome else np.zeros(0, dtype=np.int8)
+    info = {
+        'rows': int(len(outcome)),
+        'class_counts': dict(zip(CLASS_NAMES, np.bincount(outcome, minlength=len(CLASS_NAMES)).tolist())),
+        'created_at': datetime.now(timezone.utc).isoformat()
+    }
+    arrays = {
+        'project_id': np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64),
+        'description_blob': np.frombuffer(b''.join(blobs), dtype=np.uint8),
+        'description_offsets': np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+        'progress': np.concatenate(progress) if progress else np.zeros(0),
+        'created_at': np.concatenate(created) if created else np.zeros(0, dtype='datetime64[s]'),
+        'outcome': outcome,
+        'info': np.array(json.dumps(info))
+    }
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    # A un archivo abierto: np.savez no le agrega la extensión .npz al temporal
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+    info['bytes'] = os.path.getsize(path)
+    return info
+
+
+def load_training_snapshot(path):
+    """Carga un snapshot de write_training_snapshot como DataFrame de entrenamiento"""
+    with np.load(path, allow_pickle=False) as data:
+        text = data['description_blob'].tobytes().decode('utf-8')
+        offsets = data['description_offsets'].tolist()
+        return pd.DataFrame({
+            'description': [text[start:end] for start, end in zip(offsets[:-1], offsets[1:])],
+            'progress': data['progress'],
+            'created_at': data['created_at'],
+            'outcome': data['outcome'].astype(int)
+        })
+
+
+def _is_snapshot(path):
+    return str(path).endswith(SNAPSHOT_EXTENSION)
+
+
+def _read_training_frame(path):
+    """Dataset de entrenamiento desde un CSV o un snapshot .npz"""
+    if _is_snapshot(path):
+        return load_training_snapshot(path)
+    return pd.read_csv(path, encoding='utf-8')
+
+
+def train_model(csv_path, model_path=MODEL_PATH, mode=None, force=False, target_p99_ms=None,
+                max_artifact_bytes=None):
     """Entrena el modelo con mejores prácticas"""
+    return train_model_report(csv_path, model_path, mode=mode, force=force, target_p99_ms=target_p99_ms,
+                              max_artifact_bytes=max_artifact_bytes)['model_path']
+
+
+def _clean_training_frame(df):
+    """Descarta filas sin outcome o con descripción vacía"""
+    df = df.dropna(subset=['outcome'])
+    df['description'] = df['description'].fillna('')
+    return df[df['description'].str.strip() != '']  # Eliminar descripciones vacías
+
+
+def _resolve_training_mode(csv_path, mode=None):
+    mode = mode or TRAINING_MODE
+    if mode == 'auto':
+        return 'streaming' if os.path.getsize(csv_path) >= STREAMING_THRESHOLD_BYTES else 'batch'
+    if mode not in ('batch', 'streaming', 'select'):
+        raise ValueError(f"Modo de entrenamiento desconocido: '{mode}'")
+    return mode
+
+
+def _simple_param(value):
+    if isinstance(value, (list, tuple)):
+        return all(_simple_param(v) for v in value)
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def _training_hash(df, y, pipe, mode):
+    """Hash de las filas crudas normalizadas y de los hiperparámetros del pipeline.
+
+    Se hashean descripción, progreso, fecha de creación y outcome, no la matriz
+    de features: la antigüedad se calcula contra hoy y el mismo dataset
+    cambiaría de hash de un día al otro.
+    """
+    params = sorted(
+        (name, value) for name, value in pipe.get_params(deep=True).items()
+        if _simple_param(value) and not name.endswith(('n_jobs', 'verbose'))
+    )
+    if 'created_at' in df.columns:
+        created = _parse_created_series(df['created_at'].astype(object))
+    else:
+        created = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    progress = pd.to_numeric(df['progress'], errors='coerce') if 'progress' in df.columns else 0
+    rows = pd.DataFrame({
+        'description': df['description'].fillna('').astype(str).to_numpy(),
+        'progress': (pd.Series(progress, index=df.index, dtype=float).fillna(0).clip(0, 100)).to_numpy(),
+        'created_at': created.to_numpy(dtype='datetime64[ns]'),
+        'outcome': np.asarray(y, dtype=np.int64)
+    })
+    keywords = (HIGH_SUCCESS_KEYWORDS, MEDIUM_SUCCESS_KEYWORDS, LOW_SUCCESS_KEYWORDS)
+    h = hashlib.sha256()
+    h.update(repr((mode, params, CLASS_NAMES, MODEL_FEATURES, keywords, sklearn.__version__)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _cached_training_report(training_hash, model_path):
+    """Si el registro ya tiene un modelo entrenado con este hash, lo marca como actual"""
+    registry_dir = model_registry.registry_dir_for(model_path)
+    if registry_dir is None:
+        return None
+    info = model_registry.find_version(registry_dir, training_hash=training_hash)
+    if info is None:
+        return None
+    version = info['version']
+    model_registry.set_current(version, registry_dir)
+    report = {k: v for k, v in info.items() if k not in ('version', 'published_at', 'size_bytes', 'current')}
+    report.update({
+        'status': 'cache_hit',
+        'model_path': model_registry.version_path(version, registry_dir),
+        'model_version': version,
+        'artifact_bytes': info.get('size_bytes')
+    })
+    return report
+
+
+def train_model_report(csv_path, model_path=MODEL_PATH, mode=None, force=False, target_p99_ms=None,
+                       max_artifact_bytes=None):
+    """Entrena el modelo y devuelve un resumen con las métricas del entrenamiento.
+
+    mode='streaming' (o 'auto' con archivos grandes) usa train_model_streaming.
+    mode='select' elige los hiperparámetros con select_model antes del fit y
+    guarda en el modelo las métricas de validación cruzada.
+    Con target_p99_ms y/o max_artifact_bytes (por defecto ML_TARGET_P99_MS y
+    ML_MAX_ARTIFACT_MB) entrena los perfiles de PIPELINE_PROFILES del más
+    preciso al más rápido y se queda con el primero que cumple; si ninguno
+    cumple, con el más rápido. El perfil y su latencia medida quedan en
+    meta['profile'].
+    Si el registro ya tiene un modelo entrenado con el mismo dataset normalizado
+    e hiperparámetros, lo vuelve a marcar como actual sin entrenar y devuelve
+    status='cache_hit' (force=True entrena igual). El hash es el de las filas
+    crudas, así que el mismo CSV se reutiliza aunque se vuelva a subir otro día.
+    """
+    training_mode = _resolve_training_mode(csv_path, mode)
+    if training_mode == 'streaming':
+        return train_model_streaming(csv_path, model_path)
+    
     print(f"\n{'='*60}")
     print("ENTRENAMIENTO DEL MODELO ML")
     print(f"{'='*60}\n")
     
-    df = pd.read_csv(csv_path, encoding='utf-8')
+    df = _read_training_frame(csv_path)
     
     if 'outcome' not in df.columns:
         raise ValueError("El CSV debe contener la columna 'outcome' (0/1/2 o etiquetas).")
     
     # Limpiar datos
-    df = df.dropna(subset=['outcome'])
-    df['description'] = df['description'].fillna('')
-    df = df[df['description'].str.strip() != '']  # Eliminar descripciones vacías
+    df = _clean_training_frame(df)
     
     print(f"✓ Dataset cargado: {len(df)} ejemplos")
     print("\n📊 Distribución de outcomes:")
@@ -212,99 +931,1080 @@ def train_model(csv_path, model_path=MODEL_PATH):
         print(f"   {name}: {count} ejemplos")
     print()
     
-    # Entrenar
-    print("🔄 Entrenando modelo...")
+    target_p99_ms = TARGET_P99_MS if target_p99_ms is None else target_p99_ms
+    max_artifact_bytes = MAX_ARTIFACT_BYTES if max_artifact_bytes is None else max_artifact_bytes
+    budgeted = training_mode != 'select' and (target_p99_ms is not None or max_artifact_bytes is not None)
+    
     pipe = build_pipeline()
-    pipe.fit(X, y)
+    if training_mode == 'select':
+        hash_mode = ('select', _param_key(SELECTION_GRID), SELECTION_FOLDS)
+    elif budgeted:
+        hash_mode = ('profiles', _param_key(PIPELINE_PROFILES), target_p99_ms, max_artifact_bytes)
+    else:
+        hash_mode = 'batch'
+    training_hash = _training_hash(df, y, pipe, hash_mode)
+    if not force:
+        cached = _cached_training_report(training_hash, model_path)
+        if cached is not None:
+            print(f"♻️ Dataset ya entrenado: se reutiliza la versión {cached['model_version']}")
+            print(f"{'='*60}\n")
+            return cached
+    
+    selection = None
+    if training_mode == 'select':
+        print(f"🔎 Seleccionando modelo ({len(SELECTION_GRID)} candidatos, "
+              f"presupuesto {SELECTION_TIME_BUDGET:.0f}s)...")
+        selection = select_model(X, y)
+        print(f"✓ Elegido: {selection['params']} (F1 macro CV {selection['cv']['f1_macro_mean']:.3f})\n")
+        candidates = [('custom', selection['params'])]
+    elif budgeted:
+        candidates = [(name, PIPELINE_PROFILES[name]) for name in PIPELINE_PROFILES]
+    else:
+        candidates = [(DEFAULT_PROFILE, PIPELINE_PROFILES[DEFAULT_PROFILE])]
+    
+    trained_date = datetime.now().isoformat()
+    tried = []
+    for profile, params in candidates:
+        # Entrenar
+        print(f"🔄 Entrenando modelo (perfil {profile})...")
+        pipe = build_pipeline(**params)
+        pipe.fit(X, y)
+        
+        # Calcular precisión en training (solo como referencia)
+        train_score = pipe.score(X, y)
+        print(f"✓ Precisión en entrenamiento: {train_score*100:.1f}%")
+        
+        meta = {
+            'pipeline': pipe,
+            'class_names': CLASS_NAMES,
+            'version': '2.0',
+            'trained_date': trained_date,
+            'training_hash': training_hash
+        }
+        compaction = compact_pipeline(pipe)
+        # Latencia y tamaño medidos con el modelo ya compactado, como se va a servir
+        latency = measure_inference_latency(meta, X)
+        artifact_bytes = _artifact_size(meta) if max_artifact_bytes is not None else None
+        meets_budget = ((target_p99_ms is None or latency['p99_ms'] <= target_p99_ms)
+                        and (max_artifact_bytes is None or artifact_bytes <= max_artifact_bytes))
+        tried.append({'profile': profile, 'p99_ms': latency['p99_ms'], 'artifact_bytes': artifact_bytes,
+                      'meets_budget': meets_budget})
+        print(f"⏱️ p99 de una predicción: {latency['p99_ms']} ms\n")
+        if meets_budget:
+            break
     
-    # Calcular precisión en training (solo como referencia)
-    train_score = pipe.score(X, y)
-    print(f"✓ Precisión en entrenamiento: {train_score*100:.1f}%\n")
+    profile_info = {
+        'name': profile,
+        'params': {k: list(v) if isinstance(v, tuple) else v for k, v in params.items()},
+        'inference_latency': latency,
+        'target_p99_ms': target_p99_ms,
+        'max_artifact_bytes': max_artifact_bytes,
+        'budget_met': meets_budget,
+        'tried': tried
+    }
+    if budgeted and not meets_budget:
+        print(f"⚠️ Ningún perfil cumple el objetivo; se usa '{profile}'")
     
     # Guardar
+    meta['profile'] = profile_info
+    report = {
+        'trained_date': trained_date,
+        'training_mode': training_mode,
+        'n_samples': int(len(df)),
+        'class_counts': {name: int((y == i).sum()) for i, name in enumerate(CLASS_NAMES)},
+        'train_score': float(train_score),
+        'compaction': compaction,
+        'profile': profile_info,
+        'status': 'trained',
+        'training_hash': training_hash
+    }
+    if selection is not None:
+        meta['training_mode'] = training_mode
+        meta['selection'] = selection
+        report['selection'] = selection
+    report.update(_save_model(meta, model_path, report))
+    
+    print(f"💾 Modelo guardado en: {report['model_path']} ({report['artifact_bytes'] // 1024} KB)")
+    print(f"{'='*60}\n")
+    
+    return report
+
+
+def _param_key(params):
+    """Representación estable (hasheable y serializable a JSON) de parámetros de pipeline"""
+    if isinstance(params, dict):
+        return tuple(sorted((k, _param_key(v)) for k, v in params.items()))
+    if isinstance(params, (list, tuple)):
+        return tuple(_param_key(v) for v in params)
+    return params
+
+
+# Datos de entrenamiento de cada proceso de la selección (se envían una vez por proceso)
+_CV_DATA = {}
+
+
+def _init_cv_worker(X, y):
+    _CV_DATA['X'], _CV_DATA['y'] = X, y
+
+
+def _cv_fold_score(params, train_idx, test_idx):
+    """Entrena un candidato en un fold y devuelve sus métricas sobre el fold de validación"""
+    X, y = _CV_DATA['X'], _CV_DATA['y']
+    pipe = build_pipeline(**params)
+    if params.get('classifier', 'forest') == 'forest':
+        # Los procesos ya reparten los núcleos: cada fit usa uno
+        pipe.set_params(clf__n_jobs=1)
+    start = time.perf_counter()
+    pipe.fit(X.iloc[train_idx], y.iloc[train_idx])
+    fit_s = time.perf_counter() - start
+    pred = pipe.predict(X.iloc[test_idx])
+    y_test = y.iloc[test_idx]
+    return {
+        'f1_macro': float(f1_score(y_test, pred, average='macro')),
+        'accuracy': float((pred == y_test.to_numpy()).mean()),
+        'fit_s': fit_s
+    }
+
+
+def select_model(X, y, grid=None, folds=SELECTION_FOLDS, time_budget=SELECTION_TIME_BUDGET,
+                 workers=SELECTION_WORKERS):
+    """Elige los parámetros de build_pipeline con validación cruzada estratificada.
+
+    Cada (candidato, fold) es una tarea en un pool de procesos, encoladas fold
+    por fold. A medida que llegan resultados se descartan los candidatos cuyo
+    F1 macro medio queda SELECTION_ELIMINATION_MARGIN por debajo del mejor, y
+    sus folds pendientes se cancelan. Al vencer time_budget se cancela lo que
+    no empezó (los folds en curso terminan; si ninguno terminó todavía se
+    espera el primero). Gana el mejor F1 medio entre los candidatos que
+    llegaron a más folds.
+    """
+    grid = SELECTION_GRID if grid is None else grid
+    y = pd.Series(np.asarray(y), index=X.index)
+    min_class = int(np.bincount(y).min()) if len(y) else 0
+    if len(np.unique(y)) < 2 or min_class < 2:
+        raise ValueError("Se necesitan al menos 2 ejemplos por clase para la validación cruzada.")
+    folds = max(2, min(folds, min_class))
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=42).split(X, y))
+
+    results = [[] for _ in grid]
+    eliminated = set()
+    tasks = {}
+    start = time.perf_counter()
+    deadline = start + time_budget
+    executor = ProcessPoolExecutor(
+        max_workers=min(workers, len(grid) * folds),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_cv_worker, initargs=(X, y)
+    )
+    try:
+        for f, (train_idx, test_idx) in enumerate(splits):
+            for c, params in enumerate(grid):
+                tasks[executor.submit(_cv_fold_score, params, train_idx, test_idx)] = c
+        pending = set(tasks)
+        while pending:
+            # Sin ningún fold terminado se espera igual: hace falta al menos un resultado
+            timeout = max(0.0, deadline - time.perf_counter()) if any(results) else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if not future.cancelled():
+                    results[tasks[future]].append(future.result())
+
+            # Eliminación temprana contra el mejor candidato con suficientes folds
+            means = {c: np.mean([r['f1_macro'] for r in res]) for c, res in enumerate(results)
+                     if c not in eliminated and len(res) >= SELECTION_MIN_FOLDS}
+            if means:
+                best = max(means.values())
+                for c, mean in means.items():
+                    if mean < best - SELECTION_ELIMINATION_MARGIN:
+                        eliminated.add(c)
+                        for future in [fu for fu in pending if tasks[fu] == c]:
+                            if future.cancel():
+                                pending.discard(future)
+    finally:
+        # Lo que no empezó se cancela; lo que está corriendo termina
+        executor.shutdown(wait=True, cancel_futures=True)
+    elapsed = time.perf_counter() - start
+
+    alive = [c for c in range(len(grid)) if c not in eliminated and results[c]]
+    most_folds = max(len(results[c]) for c in alive)
+    winner = max((c for c in alive if len(results[c]) == most_folds),
+                 key=lambda c: np.mean([r['f1_macro'] for r in results[c]]))
+
+    def summary(c):
+        res = results[c]
+        f1 = [r['f1_macro'] for r in res]
+        return {
+            'params': {k: list(v) if isinstance(v, tuple) else v for k, v in grid[c].items()},
+            'folds': len(res),
+            'f1_macro_mean': round(float(np.mean(f1)), 4) if res else None,
+            'f1_macro_std': round(float(np.std(f1)), 4) if res else None,
+            'accuracy_mean': round(float(np.mean([r['accuracy'] for r in res])), 4) if res else None,
+            'fit_s_mean': round(float(np.mean([r['fit_s'] for r in res])), 3) if res else None,
+            'eliminated': c in eliminated
+        }
+
+    candidates = [summary(c) for c in range(len(grid))]
+    return {
+        'params': dict(grid[winner]),
+        'cv': {k: v for k, v in candidates[winner].items() if k != 'params'},
+        'candidates': candidates,
+        'folds': folds,
+        'elapsed_s': round(elapsed, 2),
+        'time_budget_s': time_budget,
+        'budget_exhausted': any(len(r) < folds for c, r in enumerate(results) if c not in eliminated)
+    }
+
+
+def _artifact_size(meta):
+    """Bytes que ocupa el artefacto serializado igual que en _save_model"""
+    fd, path = tempfile.mkstemp(suffix='.joblib')
+    os.close(fd)
+    try:
+        joblib.dump(meta, path, compress=0)
+        return os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+
+def measure_inference_latency(meta, X, samples=LATENCY_SAMPLES):
+    """Latencia de una predicción de una fila (p50/p99 en ms), como en una request"""
+    rows = [X.iloc[[i]] for i in range(min(samples, len(X)))]
+    if not rows:
+        return None
+    latencies = []
+    with _NATIVE_THREADS.limit(INFERENCE_THREADS):
+        _predict_proba(meta, rows[0], INFERENCE_THREADS, INFERENCE_ENGINE)
+        for row in rows:
+            start = time.perf_counter()
+            _predict_proba(meta, row, INFERENCE_THREADS, INFERENCE_ENGINE)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        'engine': INFERENCE_ENGINE,
+        'samples': len(latencies),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3)
+    }
+
+
+class StreamingPreprocessor(BaseEstimator, TransformerMixin):
+    """Texto con HashingVectorizer (sin vocabulario) + numéricas escaladas por bloques"""
+
+    def __init__(self, n_features=2 ** 18, ngram_range=(1, 3)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    def _vectorizer(self):
+        return HashingVectorizer(n_features=self.n_features, ngram_range=self.ngram_range,
+                                 alternate_sign=False, norm='l2')
+
+    def partial_fit(self, X, y=None):
+        if not hasattr(self, 'scaler_'):
+            self.scaler_ = StandardScaler()
+        self.scaler_.partial_fit(X[MODEL_FEATURES].to_numpy(dtype=float))
+        return self
+
+    def fit(self, X, y=None):
+        if hasattr(self, 'scaler_'):
+            del self.scaler_
+        return self.partial_fit(X, y)
+
+    def transform(self, X):
+        text = self._vectorizer().transform(X['description'])
+        numeric = self.scaler_.transform(X[MODEL_FEATURES].to_numpy(dtype=float))
+        return sparse.hstack([text, sparse.csr_matrix(numeric)], format='csr')
+
+
+class SoftmaxSGDClassifier(SGDClassifier):
+    """SGDClassifier con probabilidades softmax de los márgenes, escalados por temperature_.
+
+    El predict_proba de SGD con log_loss normaliza clasificadores uno contra
+    resto: con márgenes grandes varias clases saturan en 1.0 y salen empates
+    como [0.5, 0.5, 0]. El softmax conserva el orden de los márgenes y la
+    temperatura (ajustada en un holdout) lo calibra.
+    """
+
+    def predict_log_proba(self, X):
+        return log_softmax(self.decision_function(X) / getattr(self, 'temperature_', 1.0), axis=1)
+
+    def predict_proba(self, X):
+        return np.exp(self.predict_log_proba(X))
+
+
+def _fit_temperature(scores, y):
+    """Temperatura que minimiza la log-loss del softmax de scores / T"""
+    rows = np.arange(len(y))
+
+    def nll(log_t):
+        return -log_softmax(scores / np.exp(log_t), axis=1)[rows, y].mean()
+
+    # T >= 1: solo suaviza; un holdout chico y sin errores no vuelve a saturar
+    return float(np.exp(minimize_scalar(nll, bounds=(0.0, 4.0), method='bounded').x))
+
+
+def _iter_training_chunks(csv_path, chunksize):
+    if _is_snapshot(csv_path):
+        # El snapshot ya es compacto en memoria; se recorre en bloques igual que el CSV
+        df = load_training_snapshot(csv_path)
+        chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+    else:
+        chunks = pd.read_csv(csv_path, encoding='utf-8', chunksize=chunksize)
+    for chunk in chunks:
+        chunk = _clean_training_frame(chunk)
+        if len(chunk):
+            yield chunk
+
+
+def train_model_streaming(csv_path, model_path=MODEL_PATH, chunksize=STREAMING_CHUNK_SIZE,
+                          epochs=3, n_features=2 ** 18):
+    """Entrena por bloques con memoria acotada, sin importar el tamaño del CSV.
+
+    Primera pasada: conteo de clases y media/varianza de las numéricas.
+    Pasadas siguientes: SGDClassifier.partial_fit bloque a bloque. El texto se
+    vectoriza con hashing, así que no hay vocabulario que crezca con los datos.
+    Al final se calibran las probabilidades con un holdout acotado que no se
+    usa para entrenar (ver SoftmaxSGDClassifier).
+    """
+    print(f"\n{'='*60}")
+    print("ENTRENAMIENTO DEL MODELO ML (STREAMING)")
+    print(f"{'='*60}\n")
+    
+    header = pd.read_csv(csv_path, encoding='utf-8', nrows=0) if not _is_snapshot(csv_path) else None
+    if header is not None and 'outcome' not in header.columns:
+        raise ValueError("El CSV debe contener la columna 'outcome' (0/1/2 o etiquetas).")
+    
+    # Misma referencia temporal para todos los bloques
+    reference_time = _reference_timestamp()
+    classes = np.arange(len(CLASS_NAMES))
+    
+    # Pasada 1: estadísticas
+    pre = StreamingPreprocessor(n_features=n_features)
+    counts = np.zeros(len(classes), dtype=np.int64)
+    for chunk in _iter_training_chunks(csv_path, chunksize):
+        pre.partial_fit(_make_features(chunk, reference_time=reference_time))
+        y = _map_target(chunk['outcome'])
+        counts += np.bincount(y.clip(0, len(classes) - 1), minlength=len(classes))
+    
+    n_samples = int(counts.sum())
+    if n_samples == 0:
+        raise ValueError("El CSV no contiene ejemplos válidos para entrenar.")
+    print(f"✓ Dataset recorrido: {n_samples} ejemplos")
+    
+    # Holdout de calibración: una fila de cada `every` según su posición global
+    # (la misma en todas las pasadas); nunca más de un cuarto del dataset
+    holdout_rows = min(STREAMING_HOLDOUT_MAX_ROWS, max(STREAMING_HOLDOUT_MIN_ROWS,
+                                                       int(n_samples * STREAMING_HOLDOUT_FRACTION)),
+                       n_samples // 4)
+    every = n_samples // holdout_rows if holdout_rows >= 2 else 0
+
+    def holdout_mask(offset, n):
+        pos = np.arange(offset, offset + n)
+        if not every:
+            return np.zeros(n, dtype=bool)
+        return (pos % every == 0) & (pos < every * holdout_rows)
+    
+    # Equivalente a class_weight='balanced', calculado con los conteos globales
+    class_weight = {int(c): (n_samples / (len(classes) * counts[c]) if counts[c] else 1.0) for c in classes}
+    # Con alpha=1e-5 los márgenes crecían sin control y las probabilidades saturaban
+    clf = SoftmaxSGDClassifier(loss='log_loss', alpha=1e-4, class_weight=class_weight, random_state=42)
+    
+    # Pasadas siguientes: entrenamiento incremental
+    print("🔄 Entrenando modelo por bloques...")
+    rng = np.random.RandomState(42)
+    correct = seen = 0
+    holdout_X, holdout_y = [], []
+    for epoch in range(epochs):
+        offset = 0
+        for chunk in _iter_training_chunks(csv_path, chunksize):
+            held = holdout_mask(offset, len(chunk))
+            offset += len(chunk)
+            if epoch == 0 and held.any():
+                holdout_X.append(_make_features(chunk[held], reference_time=reference_time))
+                holdout_y.append(_map_target(chunk['outcome'][held]).clip(0, len(classes) - 1).to_numpy())
+            chunk = chunk[~held]
+            if not len(chunk):
+                continue
+            chunk = chunk.iloc[rng.permutation(len(chunk))]
+            Xt = pre.transform(_make_features(chunk, reference_time=reference_time))
+            y = _map_target(chunk['outcome']).clip(0, len(classes) - 1).to_numpy()
+            # Validación progresiva en la última pasada: se evalúa antes de aprender el bloque
+            if epoch == epochs - 1 and hasattr(clf, 'coef_'):
+                correct += int((clf.predict(Xt) == y).sum())
+                seen += len(y)
+            clf.partial_fit(Xt, y, classes=classes)
+    
+    progressive_score = correct / seen if seen else None
+    if progressive_score is not None:
+        print(f"✓ Precisión progresiva (última pasada): {progressive_score*100:.1f}%")
+    
+    # Calibración: temperatura del softmax ajustada en el holdout
+    calibration = {'holdout_samples': 0, 'temperature': 1.0}
+    if holdout_y:
+        yh = np.concatenate(holdout_y)
+        Xh = pre.transform(pd.concat(holdout_X))
+        clf.temperature_ = _fit_temperature(clf.decision_function(Xh), yh)
+        proba = clf.predict_proba(Xh)
+        calibration = {
+            'holdout_samples': int(len(yh)),
+            'temperature': round(clf.temperature_, 4),
+            'holdout_accuracy': round(float((proba.argmax(axis=1) == yh).mean()), 4),
+            'holdout_log_loss': round(float(-np.log(np.clip(proba[np.arange(len(yh)), yh], 1e-15, None)).mean()), 4)
+        }
+        print(f"✓ Calibración en {len(yh)} ejemplos de holdout: T={clf.temperature_:.3f}, "
+              f"log-loss {calibration['holdout_log_loss']:.3f}")
+    print()
+    
+    trained_date = datetime.now().isoformat()
     meta = {
-        'pipeline': pipe,
+        'pipeline': Pipeline([('pre', pre), ('clf', clf)]),
         'class_names': CLASS_NAMES,
         'version': '2.0',
-        'trained_date': datetime.now().isoformat()
+        'training_mode': 'streaming',
+        'trained_date': trained_date
     }
-    joblib.dump(meta, model_path)
+    report = {
+        'trained_date': trained_date,
+        'training_mode': 'streaming',
+        'n_samples': n_samples,
+        'class_counts': {name: int(counts[i]) for i, name in enumerate(CLASS_NAMES)},
+        'train_score': progressive_score,
+        'calibration': calibration,
+        'status': 'trained'
+    }
+    report.update(_save_model(meta, model_path, report))
     
-    print(f"💾 Modelo guardado en: {model_path}")
+    print(f"💾 Modelo guardado en: {report['model_path']}")
     print(f"{'='*60}\n")
     
+    return report
+
+
+def _save_model(meta, model_path, info):
+    """Publica el modelo en el registro de su scope o lo escribe de forma atómica (archivo suelto)"""
+    registry_dir = model_registry.registry_dir_for(model_path)
+    if registry_dir is not None:
+        version = model_registry.publish(meta, info, registry_dir)
+        saved_path = model_registry.version_path(version, registry_dir)
+        # Los sandboxes no acumulan versiones: solo el registro global guarda historia
+        if registry_dir != model_registry.REGISTRY_DIR:
+            model_registry.prune(SCOPE_KEEP_VERSIONS, registry_dir)
+    else:
+        meta['model_version'] = model_registry.new_version()
+        model_registry.atomic_dump(meta, model_path)
+        saved_path = model_path
+    clear_prediction_cache()
+    return {
+        'model_path': saved_path,
+        'model_version': meta['model_version'],
+        'artifact_bytes': os.path.getsize(saved_path)
+    }
+
+
+def resolve_model_path(model_path=MODEL_PATH):
+    """Ruta real del artefacto: la versión actual del registro del scope o la ruta indicada"""
+    registry_dir = model_registry.registry_dir_for(model_path)
+    if registry_dir is not None:
+        current = model_registry.current_model_path(registry_dir)
+        if current:
+            return current
     return model_path
 
-def load_model(model_path=MODEL_PATH):
-    """Carga el modelo entrenado"""
+def load_model(model_path=MODEL_PATH, mmap_mode=None):
+    """Carga el modelo entrenado.
+
+    Con mmap_mode='r' los arrays de NumPy del artefacto se mapean desde el
+    archivo en lugar de copiarse. Los árboles no: se reconstruyen desde el
+    bosque compilado en memoria privada (ver MODEL_MMAP_MODE).
+    """
+    model_path = resolve_model_path(model_path)
     if not os.path.exists(model_path):
         return None
-    return joblib.load(model_path)
+    return joblib.load(model_path, mmap_mode=mmap_mode)
+
+
+def _file_signature(model_path):
+    """Firma barata del artefacto en disco (ruta real, inode, tamaño, mtime)"""
+    model_path = resolve_model_path(model_path)
+    try:
+        st = os.stat(model_path)
+    except OSError:
+        return None
+    return (model_path, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+# Overhead por árbol (DecisionTreeClassifier + Tree + dicts + fragmentación),
+# calibrado con el RSS de modelos cargados
+_TREE_OVERHEAD_BYTES = 12 * 1024
+
+
+def _array_bytes(obj):
+    """Bytes de los arrays de NumPy guardados como atributos de obj"""
+    return sum(v.nbytes for v in vars(obj).values() if isinstance(v, np.ndarray))
+
+
+def _model_footprint(meta):
+    """Memoria aproximada de un modelo cargado, en bytes.
+
+    El artefacto en disco subestima mucho la memoria: el bosque compacto se
+    expande a árboles de sklearn (nodos de 64 bytes y valores float64 por
+    clase) más los arrays del bosque compilado, y el vocabulario TF-IDF pasa
+    a ser un dict de Python. Se suman esas estructuras (las variantes por
+    hilos comparten los árboles, así que no agregan).
+    """
+    from sklearn.tree._tree import NODE_DTYPE
+
+    total = 0
+    for est in _iter_estimators(meta['pipeline']):
+        total += _array_bytes(est)
+        for tree_est in getattr(est, 'estimators_', None) or ():
+            tree = getattr(tree_est, 'tree_', None)
+            if tree is not None:
+                total += tree.node_count * NODE_DTYPE.itemsize + tree.value.nbytes + _TREE_OVERHEAD_BYTES
+        compiled = getattr(est, 'compiled_forest_', None)
+        if compiled is not None:
+            total += _array_bytes(compiled)
+        vocabulary = getattr(est, 'vocabulary_', None)
+        if vocabulary:
+            # dict + str de cada término + int de cada índice
+            total += sys.getsizeof(vocabulary) + sum(sys.getsizeof(t) + 28 for t in vocabulary)
+    return total
+
+
+class _ModelHolder:
+    """Mantiene el modelo en memoria y lo recarga si cambia la versión o el archivo"""
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self._lock = threading.Lock()
+        self._meta = None
+        self._signature = None
+        self._footprint = 0
+        self._reload_lock = threading.Lock()
+        self._reloader = None
+
+    def get(self):
+        signature = _file_signature(self.model_path)
+        if signature is None:
+            return None
+        if self._meta is not None and signature == self._signature:
+            return self._meta
+
+        with self._lock:
+            # Otro hilo pudo haber recargado mientras esperábamos el lock
+            signature = _file_signature(self.model_path)
+            if signature is None:
+                self._meta, self._signature = None, None
+                return None
+            if self._meta is None or signature != self._signature:
+                meta = joblib.load(signature[0], mmap_mode=MODEL_MMAP_MODE)
+                # Calentar antes de publicarlo: la primera request tras un
+                # reentrenamiento no paga la primera llamada al pipeline
+                _warm_up_pipeline(meta)
+                self._footprint = _model_footprint(meta)
+                self._meta, self._signature = meta, signature
+            return self._meta
+
+    @property
+    def resident_bytes(self):
+        """Memoria aproximada del modelo residente (ver _model_footprint)"""
+        return self._footprint if self._meta is not None else 0
+
+    def resident_meta(self, stale_ok=False):
+        """Modelo en memoria si sigue siendo el del disco; nunca carga.
+
+        Con stale_ok=True devuelve también el modelo ya reemplazado en disco
+        (reentrenamiento o rollback), que sigue sirviendo hasta recargarse.
+        """
+        meta, signature = self._meta, self._signature
+        if meta is not None and (stale_ok or signature == _file_signature(self.model_path)):
+            return meta
+        return None
+
+    def reload_in_background(self):
+        """Recarga el modelo en un hilo aparte (uno por vez); no bloquea"""
+        with self._reload_lock:
+            if self._reloader is not None and self._reloader.is_alive():
+                return
+            self._reloader = threading.Thread(target=self._reload, name='model-reload', daemon=True)
+            self._reloader.start()
+
+    def _reload(self):
+        try:
+            get_model(self.model_path)
+        except Exception as e:
+            print(f"⚠️ No se pudo recargar el modelo {self.model_path}: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._meta, self._signature = None, None
+
+
+# Modelos residentes por worker, en orden LRU: {ruta absoluta: _ModelHolder}.
+# El modelo global nunca se desaloja; los de cohortes y sandboxes sí.
+_MODEL_HOLDERS = OrderedDict()
+_MODEL_HOLDERS_LOCK = threading.Lock()
+_PINNED_MODELS = {os.path.abspath(MODEL_PATH)}
+
+
+def _evict_resident_models(keep):
+    """Desaloja los modelos menos usados hasta respetar MAX_RESIDENT_MODELS y MAX_RESIDENT_BYTES"""
+    with _MODEL_HOLDERS_LOCK:
+        resident = [(key, h) for key, h in _MODEL_HOLDERS.items() if h.resident_bytes]
+        count = len(resident)
+        total = sum(h.resident_bytes for _, h in resident)
+        for key, holder in resident:
+            if count <= MAX_RESIDENT_MODELS and total <= MAX_RESIDENT_BYTES:
+                break
+            if key == keep or key in _PINNED_MODELS:
+                continue
+            count -= 1
+            total -= holder.resident_bytes
+            del _MODEL_HOLDERS[key]
+            holder.clear()
+
+
+def get_model(model_path=MODEL_PATH):
+    """Devuelve el modelo residente en memoria (lo carga o recarga solo si cambió)"""
+    key = os.path.abspath(model_path)
+    with _MODEL_HOLDERS_LOCK:
+        holder = _MODEL_HOLDERS.get(key)
+        if holder is None:
+            holder = _MODEL_HOLDERS[key] = _ModelHolder(model_path)
+        _MODEL_HOLDERS.move_to_end(key)
+    loaded_before = holder.resident_bytes
+    meta = holder.get()
+    if holder.resident_bytes != loaded_before:
+        _evict_resident_models(keep=key)
+    return meta
+
+
+def resident_models():
+    """Modelos residentes en este proceso, del menos al más usado"""
+    with _MODEL_HOLDERS_LOCK:
+        return [{'model_path': h.model_path, 'bytes': h.resident_bytes}
+                for h in _MODEL_HOLDERS.values() if h.resident_bytes]
+
+
+# Proyecto de ejemplo para el warm-up del pipeline
+_WARMUP_PROJECT = {
+    'description': 'Prototipo validado con usuarios y primeras ventas',
+    'progress': 50,
+    'created_at': None
+}
+
+
+def _warm_up_pipeline(meta):
+    """Pasa una fila de ejemplo por todo el pipeline (ColumnTransformer + clasificador)"""
+    try:
+        X = _features_frame([_project_features(_WARMUP_PROJECT, _reference_timestamp())])
+        with _NATIVE_THREADS.limit(INFERENCE_THREADS):
+            _predict_proba(meta, X, INFERENCE_THREADS, INFERENCE_ENGINE)
+    except Exception as e:
+        print(f"⚠️ No se pudo calentar el modelo: {e}")
+
+
+def warm_up(model_path=MODEL_PATH):
+    """Deja el modelo residente y caliente en este proceso; devuelve su versión o None"""
+    meta = get_model(model_path)
+    if meta is None:
+        return None
+    # Tras un fork el modelo ya está cargado, pero cada worker paga su primera llamada
+    _warm_up_pipeline(meta)
+    return _model_version(meta)
+
+
+def resident_model_state(model_path=MODEL_PATH, reload=False):
+    """(versión residente, si es la del disco) en este proceso, o (None, False).
+
+    Nunca carga en el hilo que llama. Si el artefacto cambió en disco, la
+    versión anterior sigue residente y sirviendo; con reload=True se recarga
+    la nueva en segundo plano (así /healthz/ready no saca al worker de
+    rotación tras un reentrenamiento o un rollback).
+    """
+    holder = _MODEL_HOLDERS.get(os.path.abspath(model_path))
+    meta = holder.resident_meta(stale_ok=True) if holder is not None else None
+    if meta is None:
+        return None, False
+    current = holder.resident_meta() is meta
+    if not current and reload:
+        holder.reload_in_background()
+    return _model_version(meta), current
+
 
-def predict_project(project_dict, model_path=MODEL_PATH):
+def resident_model_profile(model_path=MODEL_PATH):
+    """Perfil (meta['profile']) del modelo residente en este proceso, o None (no carga nada)"""
+    holder = _MODEL_HOLDERS.get(os.path.abspath(model_path))
+    meta = holder.resident_meta() if holder is not None else None
+    return meta.get('profile') if meta is not None else None
+
+
+def _model_version(meta):
+    """Identificador de la versión del modelo (cambia en cada entrenamiento)"""
+    return meta.get('model_version') or meta.get('trained_date') or meta.get('version')
+
+
+class _PredictionCache:
+    """Cache LRU (con TTL opcional) de resultados de predict_project"""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), copy.deepcopy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl
+            }
+
+
+class _NativeThreadLimiter:
+    """Limita los pools de BLAS/OpenMP con threadpoolctl.
+
+    Fuera de los lotes el límite es INFERENCE_THREADS; mientras haya algún lote
+    en curso sube a BATCH_THREADS y vuelve al terminar el último. Se lleva la
+    cuenta con un lock porque el límite es global al proceso y varios hilos del
+    servidor pueden predecir a la vez.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._controller = None
+        self._current = None
+        self._active_batches = 0
+
+    def _set(self, limit):
+        if limit == self._current:
+            return
+        if self._controller is None:
+            self._controller = ThreadpoolController()
+        self._controller.limit(limits=limit)
+        self._current = limit
+
+    def ensure_default(self):
+        if self._current is None:
+            with self._lock:
+                if self._current is None:
+                    self._set(INFERENCE_THREADS)
+
+    @contextmanager
+    def limit(self, n_jobs):
+        if n_jobs <= INFERENCE_THREADS:
+            self.ensure_default()
+            yield
+            return
+        with self._lock:
+            self._active_batches += 1
+            self._set(max(n_jobs, self._current or 1))
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active_batches -= 1
+                if self._active_batches == 0:
+                    self._set(INFERENCE_THREADS)
+
+
+_NATIVE_THREADS = _NativeThreadLimiter()
+
+# Variantes del pipeline por cantidad de hilos: {pipeline: {n_jobs: pipeline}}
+_PIPELINE_VARIANTS = weakref.WeakKeyDictionary()
+_PIPELINE_VARIANTS_LOCK = threading.Lock()
+
+
+def _pipeline_with_threads(pipe, n_jobs):
+    """Copia superficial del pipeline con el clasificador en n_jobs hilos.
+
+    El pipeline residente se comparte entre hilos (y entre workers tras el fork),
+    así que no se modifica: la copia comparte los árboles y solo cambia n_jobs.
+    """
+    with _PIPELINE_VARIANTS_LOCK:
+        variants = _PIPELINE_VARIANTS.setdefault(pipe, {})
+        variant = variants.get(n_jobs)
+        if variant is None:
+            name, clf = pipe.steps[-1]
+            if getattr(clf, 'n_jobs', n_jobs) == n_jobs:
+                variant = pipe
+            else:
+                clf = copy.copy(clf)
+                clf.n_jobs = n_jobs
+                variant = copy.copy(pipe)
+                variant.steps = pipe.steps[:-1] + [(name, clf)]
+            variants[n_jobs] = variant
+        return variant
+
+
+# Bosques compilados al cargar artefactos que no los traen: {pipeline: CompiledForest}
+_COMPILED_FORESTS = weakref.WeakKeyDictionary()
+
+
+def _compiled_forest(meta):
+    """Bosque compilado del modelo, o None si el clasificador no es un bosque de árboles"""
+    pipe = meta['pipeline']
+    compiled = getattr(pipe.steps[-1][1], 'compiled_forest_', None)
+    if compiled is not None:
+        return compiled
+    with _PIPELINE_VARIANTS_LOCK:
+        if pipe not in _COMPILED_FORESTS:
+            try:
+                _COMPILED_FORESTS[pipe] = CompiledForest.from_estimator(pipe.steps[-1][1])
+            except (TypeError, ValueError):
+                _COMPILED_FORESTS[pipe] = None
+        return _COMPILED_FORESTS[pipe]
+
+
+def _predict_proba(meta, X, n_jobs, engine):
+    """predict_proba con el motor pedido; 'compiled' cae a sklearn si no aplica"""
+    if engine not in INFERENCE_ENGINES:
+        raise ValueError(f"Motor de inferencia desconocido: '{engine}'")
+    pipe = meta['pipeline']
+    if engine == 'compiled' and len(X) < BATCH_MIN_ROWS:
+        forest = _compiled_forest(meta)
+        if forest is not None:
+            return forest.predict_proba(pipe[:-1].transform(X))
+    return _pipeline_with_threads(pipe, n_jobs).predict_proba(X)
+
+
+_PREDICTION_CACHE = _PredictionCache(
+    maxsize=int(os.environ.get('ML_PREDICTION_CACHE_SIZE', 1024)),
+    ttl=float(os.environ['ML_PREDICTION_CACHE_TTL']) if os.environ.get('ML_PREDICTION_CACHE_TTL') else None
+)
+
+
+def prediction_cache_stats():
+    """Contadores de aciertos/fallos del cache de predicciones"""
+    return _PREDICTION_CACHE.stats()
+
+
+def clear_prediction_cache():
+    """Vacía el cache de predicciones"""
+    _PREDICTION_CACHE.clear()
+
+
+def _prediction_cache_key(model_path, version, project_dict, days_since_creation):
+    """Clave del cache: versión del modelo, hash de la descripción, progreso y antigüedad"""
+    description = project_dict.get('description', '')
+    if description is None or (isinstance(description, float) and np.isnan(description)):
+        description = ''
+    desc_hash = hashlib.sha1(str(description).encode('utf-8')).hexdigest()
+    progress = project_dict.get('progress', 0)
+    try:
+        progress = float(progress)
+    except (TypeError, ValueError):
+        progress = repr(progress)
+    return (os.path.abspath(model_path), version, desc_hash, progress, int(days_since_creation))
+
+
+def predict_project(project_dict, model_path=MODEL_PATH, reference_time=None, engine=None):
     """Predice el éxito de un proyecto con explicaciones detalladas"""
-    meta = load_model(model_path)
+    return predict_projects([project_dict], model_path=model_path, reference_time=reference_time,
+                            engine=engine)[0]
+
+
+def predict_projects(projects, model_path=MODEL_PATH, reference_time=None, n_jobs=None, engine=None):
+    """Predice el éxito de varios proyectos con una sola llamada a predict_proba.
+
+    n_jobs: hilos de inferencia; por defecto BATCH_THREADS si hay al menos
+    BATCH_MIN_ROWS filas sin cache e INFERENCE_THREADS si no.
+    engine: 'sklearn' o 'compiled'; por defecto INFERENCE_ENGINE.
+    """
+    meta = get_model(model_path)
     if meta is None:
         raise FileNotFoundError("Modelo no encontrado. Entrena primero con train_model().")
     
-    pipe = meta['pipeline']
+    projects = list(projects)
+    if not projects:
+        return []
+    
     class_names = meta.get('class_names', CLASS_NAMES)
+    version = _model_version(meta)
+    ref = _reference_timestamp(reference_time)
     
-    # Crear DataFrame
-    df = pd.DataFrame([project_dict])
-    X = _make_features(df)
+    # Llamadas chicas (requests): features escalares sin pandas; lotes: vectorizadas
+    rows = None
+    if len(projects) < BATCH_MIN_ROWS:
+        rows = [_project_features(p, ref) for p in projects]
+        days = [row[MODEL_FEATURES.index('days_since_creation') + 1] for row in rows]
+    else:
+        days = _days_since(pd.Series([p.get('created_at') for p in projects], dtype=object), ref)
     
-    try:
-        # Predicción
-        probs = pipe.predict_proba(X)[0]
-        pred_index = int(np.argmax(probs))  # Convertir a Python int
-        
-        # Crear diccionario de probabilidades (convertir numpy types)
-        probs_dict = {}
-        for i in range(len(class_names)):
-            probs_dict[class_names[i]] = float(probs[i])  # Convertir a float Python
-        
-        # Análisis de features para explicación (convertir numpy types)
-        features_analysis = {
-            'progress': int(project_dict.get('progress', 0)),
-            'description_length': int(len(str(project_dict.get('description', '')))),
-            'word_count': int(len(str(project_dict.get('description', '')).split())),
-            'days_active': int(X['days_since_creation'].iloc[0]) if 'days_since_creation' in X.columns else 0,
-            'high_keywords_found': int(X['high_keywords'].iloc[0]) if 'high_keywords' in X.columns else 0,
-            'medium_keywords_found': int(X['medium_keywords'].iloc[0]) if 'medium_keywords' in X.columns else 0,
-            'low_keywords_found': int(X['low_keywords'].iloc[0]) if 'low_keywords' in X.columns else 0
-        }
-        
-        # Generar explicación
-        explanation = _generate_explanation(pred_index, project_dict, probs_dict, features_analysis)
-        
-        return {
-            'label_index': pred_index,  # Ya es Python int
-            'label': class_names[pred_index],
-            'prediction': class_names[pred_index],
-            'probs': probs_dict,
-            'probabilities': probs_dict,
-            'confidence': float(probs[pred_index]),  # Convertir a float Python
-            'features_analysis': features_analysis,
-            'explanation': explanation
-        }
+    # La antigüedad es lo único que depende del reloj; entra en la clave del cache
+    keys = [_prediction_cache_key(model_path, version, p, d) for p, d in zip(projects, days)]
+    
+    results = [_PREDICTION_CACHE.get(key) for key in keys]
+    pending = [i for i, r in enumerate(results) if r is None]
+    if not pending:
+        return results
     
+    # Features solo de los proyectos que no estaban en cache
+    if rows is not None:
+        X = _features_frame([rows[i] for i in pending])
+    else:
+        X = _make_features(pd.DataFrame([projects[i] for i in pending]), reference_time=ref)
+    
+    if n_jobs is None:
+        n_jobs = BATCH_THREADS if len(pending) >= BATCH_MIN_ROWS else INFERENCE_THREADS
+    
+    try:
+        # Predicción vectorizada
+        with _NATIVE_THREADS.limit(n_jobs):
+            all_probs = _predict_proba(meta, X, n_jobs, engine or INFERENCE_ENGINE)
     except Exception as e:
         print(f"❌ Error en predicción: {e}")
         import traceback
         traceback.print_exc()
-        
-        # Fallback seguro
-        return {
-            'label_index': 1,
-            'label': 'Medio éxito',
-            'prediction': 'Medio éxito',
-            'probs': {'Bajo éxito': 0.33, 'Medio éxito': 0.34, 'Alto éxito': 0.33},
-            'probabilities': {'Bajo éxito': 0.33, 'Medio éxito': 0.34, 'Alto éxito': 0.33},
-            'confidence': 0.34,
-            'features_analysis': {},
-            'explanation': 'No se pudo analizar correctamente. Intenta con más detalles.'
-        }
+        for i in pending:
+            results[i] = _fallback_prediction()
+        return results
+    
+    for row, i in enumerate(pending):
+        try:
+            results[i] = _build_prediction(projects[i], all_probs[row], X.iloc[row], class_names)
+            _PREDICTION_CACHE.put(keys[i], results[i])
+        except Exception as e:
+            print(f"❌ Error en predicción: {e}")
+            results[i] = _fallback_prediction()
+    return results
+
+
+def current_model_version(model_path=MODEL_PATH):
+    """Versión del modelo vigente; usa el puntero del registro sin cargar el artefacto"""
+    registry_dir = model_registry.registry_dir_for(model_path)
+    if registry_dir is not None:
+        version = model_registry.current_version(registry_dir)
+        if version:
+            return version
+    meta = get_model(model_path)
+    return _model_version(meta) if meta is not None else None
+
+
+def score_projects_chunk(items, model_path=MODEL_PATH, n_jobs=None):
+    """Puntúa un bloque [(project_id, project_dict), ...] para el scoring masivo.
+
+    Pensada para correr en un pool de procesos: devuelve la versión del modelo
+    usada y una lista [(project_id, resultado), ...].
+    """
+    meta = get_model(model_path)
+    if meta is None:
+        raise FileNotFoundError("Modelo no encontrado. Entrena primero con train_model().")
+    results = predict_projects([project for _, project in items], model_path=model_path,
+                               n_jobs=n_jobs or BATCH_THREADS)
+    return _model_version(meta), [(project_id, r) for (project_id, _), r in zip(items, results)]
+
+
+def score_csv(source, model_path=MODEL_PATH, chunksize=SCORING_CHUNK_SIZE, reference_time=None, n_jobs=None):
+    """Puntúa un CSV description,progress,created_at por bloques y genera el CSV de salida.
+
+    source es una ruta o un archivo abierto. Genera texto CSV: las columnas
+    originales más 'label' y una columna de probabilidad por clase. Lee y
+    escribe de a `chunksize` filas, así la memoria no depende del tamaño del
+    archivo y la primera parte del resultado sale antes de leerlo entero.
+    """
+    # Un solo modelo para todo el archivo aunque se reentrene a mitad de camino
+    meta = get_model(model_path)
+    if meta is None:
+        raise FileNotFoundError("Modelo no encontrado. Entrena primero con train_model().")
+    class_names = list(meta.get('class_names', CLASS_NAMES))
+    ref = _reference_timestamp(reference_time)
+    if n_jobs is None:
+        n_jobs = BATCH_THREADS if chunksize >= BATCH_MIN_ROWS else INFERENCE_THREADS
+
+    # dtype=str: los valores originales se devuelven tal cual
+    reader = pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False, encoding='utf-8')
+    header = True
+    for chunk in reader:
+        if 'description' not in chunk.columns:
+            raise ValueError("El CSV debe tener una columna 'description'")
+        with _NATIVE_THREADS.limit(n_jobs):
+            probs = _predict_proba(meta, _make_features(chunk, reference_time=ref), n_jobs, INFERENCE_ENGINE)
+        chunk['label'] = np.asarray(class_names, dtype=object)[np.argmax(probs, axis=1)]
+        for i, name in enumerate(class_names):
+            chunk[name] = np.round(probs[:, i], 6)
+        yield chunk.to_csv(index=False, header=header, lineterminator='\n')
+        header = False
+
+
+def _build_prediction(project_dict, probs, features_row, class_names):
+    """Arma el diccionario de resultado para un proyecto"""
+    pred_index = int(np.argmax(probs))  # Convertir a Python int
+    
+    # Crear diccionario de probabilidades (convertir numpy types)
+    probs_dict = {}
+    for i in range(len(class_names)):
+        probs_dict[class_names[i]] = float(probs[i])  # Convertir a float Python
+    
+    # Análisis de features para explicación (convertir numpy types)
+    features_analysis = {
+        'progress': int(project_dict.get('progress', 0)),
+        'description_length': int(len(str(project_dict.get('description', '')))),
+        'word_count': int(len(str(project_dict.get('description', '')).split())),
+        'days_active': int(features_row.get('days_since_creation', 0)),
+        'high_keywords_found': int(features_row.get('high_keywords', 0)),
+        'medium_keywords_found': int(features_row.get('medium_keywords', 0)),
+        'low_keywords_found': int(features_row.get('low_keywords', 0))
+    }
+    
+    # Generar explicación
+    explanation = _generate_explanation(pred_index, project_dict, probs_dict, features_analysis)
+    
+    return {
+        'label_index': pred_index,  # Ya es Python int
+        'label': class_names[pred_index],
+        'prediction': class_names[pred_index],
+        'probs': probs_dict,
+        'probabilities': probs_dict,
+        'confidence': float(probs[pred_index]),  # Convertir a float Python
+        'features_analysis': features_analysis,
+        'explanation': explanation
+    }
+
+
+def _fallback_prediction():
+    """Resultado seguro cuando no se puede predecir"""
+    return {
+        'label_index': 1,
+        'label': 'Medio éxito',
+        'prediction': 'Medio éxito',
+        'probs': {'Bajo éxito': 0.33, 'Medio éxito': 0.34, 'Alto éxito': 0.33},
+        'probabilities': {'Bajo éxito': 0.33, 'Medio éxito': 0.34, 'Alto éxito': 0.33},
+        'confidence': 0.34,
+        'features_analysis': {},
+        'explanation': 'No se pudo analizar correctamente. Intenta con más detalles.'
+    }
 
 def _generate_explanation(pred_index, project_dict, probs_dict, features_analysis):
     """Genera explicación de la predicción"""
@@ -0,0 +1,149 @@
+"""Fachada liviana del modelo de éxito.
+
+Importar este módulo no carga pandas, NumPy ni scikit-learn: ml_model_multiclass
+se importa recién la primera vez que se llama a una función que lo necesita.
+Así los workers y comandos que no usan ML (login, paneles, initdb) arrancan
+sin pagar el costo de esas librerías.
+"""
+import os
+import sys
+import importlib
+import threading
+
+import model_registry
+
+ML_MODULE = 'ml_model_multiclass'
+MODEL_PATH = model_registry.DEFAULT_MODEL_PATH
+
+_import_lock = threading.Lock()
+
+
+def _ml():
+    """Módulo de ML, importado bajo demanda"""
+    module = sys.modules.get(ML_MODULE)
+    if module is not None:
+        return module
+    with _import_lock:
+        return importlib.import_module(ML_MODULE)
+
+
+def is_loaded():
+    """True si el módulo de ML ya fue importado en este proceso"""
+    return ML_MODULE in sys.modules
+
+
+def predict_project(project_dict, model_path=MODEL_PATH, reference_time=None, engine=None):
+    return _ml().predict_project(project_dict, model_path=model_path, reference_time=reference_time,
+                                 engine=engine)
+
+
+def predict_projects(projects, model_path=MODEL_PATH, reference_time=None, n_jobs=None, engine=None):
+    return _ml().predict_projects(projects, model_path=model_path, reference_time=reference_time,
+                                  n_jobs=n_jobs, engine=engine)
+
+
+def score_projects_chunk(items, model_path=MODEL_PATH, n_jobs=None):
+    # Función de módulo para que se pueda enviar a un pool de procesos
+    return _ml().score_projects_chunk(items, model_path=model_path, n_jobs=n_jobs)
+
+
+def score_csv(source, model_path=MODEL_PATH, chunksize=None, reference_time=None, n_jobs=None):
+    ml = _ml()
+    return ml.score_csv(source, model_path=model_path, chunksize=chunksize or ml.SCORING_CHUNK_SIZE,
+                        reference_time=reference_time, n_jobs=n_jobs)
+
+
+def train_model(csv_path, model_path=MODEL_PATH, mode=None, target_p99_ms=None, max_artifact_bytes=None):
+    return _ml().train_model(csv_path, model_path=model_path, mode=mode, target_p99_ms=target_p99_ms,
+                             max_artifact_bytes=max_artifact_bytes)
+
+
+def train_model_report(csv_path, model_path=MODEL_PATH, mode=None, target_p99_ms=None, max_artifact_bytes=None):
+    return _ml().train_model_report(csv_path, model_path=model_path, mode=mode, target_p99_ms=target_p99_ms,
+                                    max_artifact_bytes=max_artifact_bytes)
+
+
+def validate_training_csv(csv_path, max_bytes=None, limits=True):
+    # max_bytes: tope de tamaño de las subidas (lo fija app.py). limits=False:
+    # archivos del servidor (admin), sin el tope de filas
+    if limits:
+        return _ml().validate_training_csv(csv_path, max_bytes=max_bytes)
+    return _ml().validate_training_csv(csv_path, max_bytes=max_bytes, max_rows=None)
+
+
+def outcome_index(label):
+    return _ml().outcome_index(label)
+
+
+def write_training_snapshot(chunks, path):
+    return _ml().write_training_snapshot(chunks, path)
+
+
+def load_model(model_path=MODEL_PATH, mmap_mode=None):
+    return _ml().load_model(model_path=model_path, mmap_mode=mmap_mode)
+
+
+def get_model(model_path=MODEL_PATH):
+    return _ml().get_model(model_path)
+
+
+def prediction_cache_stats():
+    # Sin el módulo importado todavía no hubo predicciones en este proceso
+    if not is_loaded():
+        return None
+    return _ml().prediction_cache_stats()
+
+
+def resident_models():
+    if not is_loaded():
+        return []
+    return _ml().resident_models()
+
+
+def warm_up(model_path=MODEL_PATH):
+    return _ml().warm_up(model_path)
+
+
+def model_status(model_path=MODEL_PATH, reload=False):
+    """Estado del modelo sin cargar el artefacto ni importar el módulo de ML.
+
+    Un modelo reemplazado en disco cuenta como residente mientras siga en
+    memoria (model_current=False); con reload=True se recarga en segundo plano.
+    """
+    artifact = model_path
+    version = None
+    registry_dir = model_registry.registry_dir_for(model_path)
+    if registry_dir is not None:
+        artifact = model_registry.current_model_path(registry_dir) or model_path
+        version = model_registry.current_version(registry_dir)
+    resident_version, current = None, False
+    if is_loaded():
+        resident_version, current = _ml().resident_model_state(model_path, reload=reload)
+    return {
+        'model_exists': os.path.exists(artifact),
+        'model_resident': resident_version is not None,
+        'model_current': current,
+        'model_version': resident_version or version
+    }
+
+
+def model_profile(model_path=MODEL_PATH):
+    """Perfil del modelo vigente y su latencia medida al entrenar, o None (no carga el artefacto)"""
+    registry_dir = model_registry.registry_dir_for(model_path)
+    if registry_dir is not None:
+        version = model_registry.current_version(registry_dir)
+        if version:
+            return model_registry.get_version_info(version, registry_dir).get('profile')
+    if is_loaded():
+        return _ml().resident_model_profile(model_path)
+    return None
+
+
+def current_model_version(model_path=MODEL_PATH):
+    """Versión vigente; con el registro no hace falta importar el módulo de ML"""
+    registry_dir = model_registry.registry_dir_for(model_path)
+    if registry_dir is not None:
+        version = model_registry.current_version(registry_dir)
+        if version:
+            return version
+    return _ml().current_model_version(model_path)
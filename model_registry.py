@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import uuid
+from datetime import datetime
+
+MODEL_DIR = 'models'
+MODEL_FILENAME = 'success_multiclass.joblib'
+# Ruta lógica del modelo por defecto; se resuelve a la versión actual del registro
+DEFAULT_MODEL_PATH = os.path.join(MODEL_DIR, MODEL_FILENAME)
+REGISTRY_DIR = os.path.join(MODEL_DIR, 'registry')
+CURRENT_FILE = 'CURRENT'
+VERSIONS_DIR = 'versions'
+
+# Scopes de modelos: 'global' (producción), 'cohort-<id>' y 'user-<id>' (sandbox
+# del probador ML). Cada scope tiene su propio registro en models/scopes/<scope>/
+GLOBAL_SCOPE = 'global'
+SCOPES_DIR = os.path.join(MODEL_DIR, 'scopes')
+_SCOPE_RE = re.compile(r'^(global|(cohort|user)-[0-9A-Za-z_]+)$')
+
+# Cache del puntero CURRENT por directorio: {registry_dir: (firma, versión)}
+_current_cache = {}
+
+
+def scope_model_path(scope=GLOBAL_SCOPE):
+    """Ruta lógica del modelo de un scope"""
+    if not _SCOPE_RE.match(str(scope)):
+        raise ValueError(f"Scope inválido: '{scope}'")
+    if scope == GLOBAL_SCOPE:
+        return DEFAULT_MODEL_PATH
+    return os.path.join(SCOPES_DIR, scope, MODEL_FILENAME)
+
+
+def registry_dir_for(model_path):
+    """Registro que respalda una ruta lógica de modelo, o None si es un archivo suelto"""
+    if model_path == DEFAULT_MODEL_PATH:
+        return REGISTRY_DIR
+    scope_dir, filename = os.path.split(model_path)
+    if (filename == MODEL_FILENAME and os.path.dirname(scope_dir) == SCOPES_DIR
+            and _SCOPE_RE.match(os.path.basename(scope_dir))):
+        return os.path.join(scope_dir, 'registry')
+    return None
+
+
+def resolve_scope(scope, fallback=GLOBAL_SCOPE):
+    """Ruta lógica del scope si ya tiene un modelo publicado; si no, la del scope de respaldo"""
+    model_path = scope_model_path(scope)
+    if fallback and current_version(registry_dir_for(model_path)) is None:
+        return scope_model_path(fallback)
+    return model_path
+
+
+def _versions_dir(registry_dir):
+    return os.path.join(registry_dir, VERSIONS_DIR)
+
+
+_VERSION_RE = re.compile(r'^[0-9A-Za-z_-]+$')
+
+
+def version_path(version, registry_dir=REGISTRY_DIR):
+    """Ruta del artefacto de una versión"""
+    if not _VERSION_RE.match(str(version)):
+        raise ValueError(f"Versión inválida: '{version}'")
+    return os.path.join(_versions_dir(registry_dir), f'{version}.joblib')
+
+
+def _info_path(version, registry_dir):
+    return os.path.join(_versions_dir(registry_dir), f'{version}.json')
+
+
+def _atomic_write_text(path, text):
+    """Escribe a un temporal en el mismo directorio y lo renombra encima del destino"""
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def atomic_dump(obj, path):
+    """joblib.dump a un temporal y rename: los lectores nunca ven un pickle a medias.
+
+    Se guarda sin compresión para que el artefacto se pueda abrir con
+    joblib.load(..., mmap_mode='r').
+    """
+    import joblib
+
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        joblib.dump(obj, tmp_path, compress=0)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def new_version():
+    """Identificador de versión ordenable cronológicamente"""
+    return datetime.now().strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:6]
+
+
+def publish(meta, info=None, registry_dir=REGISTRY_DIR, version=None, make_current=True):
+    """Guarda un modelo como nueva versión inmutable y opcionalmente la marca como actual"""
+    os.makedirs(_versions_dir(registry_dir), exist_ok=True)
+    version = version or new_version()
+    meta['model_version'] = version
+
+    path = version_path(version, registry_dir)
+    atomic_dump(meta, path)
+
+    record = dict(info or {})
+    record.update({
+        'version': version,
+        'published_at': datetime.now().isoformat(),
+        'size_bytes': os.path.getsize(path)
+    })
+    _atomic_write_text(_info_path(version, registry_dir), json.dumps(record, ensure_ascii=False, indent=2))
+
+    if make_current:
+        set_current(version, registry_dir)
+    return version
+
+
+def set_current(version, registry_dir=REGISTRY_DIR):
+    """Apunta CURRENT a una versión existente (rename atómico)"""
+    if not os.path.exists(version_path(version, registry_dir)):
+        raise ValueError(f"La versión '{version}' no existe en el registro")
+    _atomic_write_text(os.path.join(registry_dir, CURRENT_FILE), version)
+
+
+def current_version(registry_dir=REGISTRY_DIR):
+    """Versión actual; solo hace un stat salvo que el puntero haya cambiado"""
+    pointer = os.path.join(registry_dir, CURRENT_FILE)
+    try:
+        st = os.stat(pointer)
+    except OSError:
+        return None
+    signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _current_cache.get(registry_dir)
+    if cached and cached[0] == signature:
+        return cached[1]
+    with open(pointer, encoding='utf-8') as f:
+        version = f.read().strip() or None
+    _current_cache[registry_dir] = (signature, version)
+    return version
+
+
+def current_model_path(registry_dir=REGISTRY_DIR):
+    """Ruta del artefacto actual o None si el registro está vacío"""
+    version = current_version(registry_dir)
+    return version_path(version, registry_dir) if version else None
+
+
+def get_version_info(version, registry_dir=REGISTRY_DIR):
+    try:
+        with open(_info_path(version, registry_dir), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'version': version}
+
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    """Versiones disponibles, de la más antigua a la más reciente"""
+    try:
+        names = os.listdir(_versions_dir(registry_dir))
+    except OSError:
+        return []
+    versions = sorted(n[:-len('.joblib')] for n in names if n.endswith('.joblib'))
+    current = current_version(registry_dir)
+    result = []
+    for v in versions:
+        info = get_version_info(v, registry_dir)
+        info['current'] = (v == current)
+        result.append(info)
+    return result
+
+
+def find_version(registry_dir=REGISTRY_DIR, **match):
+    """Versión más reciente cuyo registro coincide con todos los campos pedidos, o None"""
+    for info in reversed(list_versions(registry_dir)):
+        if all(info.get(k) == v for k, v in match.items()):
+            return info
+    return None
+
+
+def prune(keep, registry_dir=REGISTRY_DIR):
+    """Borra las versiones más viejas y deja las `keep` más recientes (nunca la actual)"""
+    current = current_version(registry_dir)
+    versions = [v['version'] for v in list_versions(registry_dir)]
+    removed = []
+    for version in versions[:max(len(versions) - keep, 0)]:
+        if version == current:
+            continue
+        for path in (version_path(version, registry_dir), _info_path(version, registry_dir)):
+            if os.path.exists(path):
+                os.remove(path)
+        removed.append(version)
+    return removed
+
+
+def rollback(version=None, registry_dir=REGISTRY_DIR):
+    """Vuelve a una versión anterior sin reentrenar (por defecto, la previa a la actual)"""
+    if version is None:
+        versions = [v['version'] for v in list_versions(registry_dir)]
+        current = current_version(registry_dir)
+        if current not in versions or versions.index(current) == 0:
+            raise ValueError('No hay una versión anterior a la actual')
+        version = versions[versions.index(current) - 1]
+    set_current(version, registry_dir)
+    return version
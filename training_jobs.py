@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import model_registry
+
+try:
+    import fcntl
+except ImportError:  # Windows: el límite queda solo por proceso
+    fcntl = None
+
+JOBS_DIR = os.path.join('models', 'jobs')
+
+# Máximo de entrenamientos simultáneos (por servidor, compartido entre workers)
+MAX_CONCURRENT_TRAININGS = max(1, int(os.environ.get('ML_MAX_CONCURRENT_TRAININGS', 1)))
+SLOT_POLL_SECONDS = 1.0
+
+# El worker web que encoló un job actualiza su latido mientras el job está
+# pendiente; si se reinicia o lo reciclan, el job queda sin latido y al leerlo
+# se marca como fallido
+JOB_HEARTBEAT_SECONDS = 10
+JOB_STALE_SECONDS = int(os.environ.get('ML_JOB_STALE_SECONDS', 120))
+# Días que se conservan los jobs terminados antes de borrarlos
+JOB_RETENTION_DAYS = float(os.environ.get('ML_JOB_RETENTION_DAYS', 7))
+
+_executor = None
+_executor_lock = threading.Lock()
+# Jobs pendientes de este proceso, cuyo latido mantiene el hilo de heartbeat
+_pending_jobs = set()
+_heartbeat_thread = None
+
+
+def _job_path(job_id, ext='json'):
+    return os.path.join(JOBS_DIR, f'{job_id}.{ext}')
+
+
+def _valid_job_id(job_id):
+    return isinstance(job_id, str) and len(job_id) == 32 and all(c in '0123456789abcdef' for c in job_id)
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _write_job(job):
+    """Escribe el estado del job de forma atómica (temporal + rename)"""
+    tmp_path = _job_path(job['id'], 'json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, _job_path(job['id']))
+
+
+def _update_job(job_id, **changes):
+    job = get_job(job_id) or {'id': job_id}
+    job.update(changes)
+    _write_job(job)
+    return job
+
+
+def _touch(path):
+    with open(path, 'a'):
+        os.utime(path)
+
+
+def _last_seen(job_id):
+    """Último latido del job: el archivo .heartbeat o la última escritura de su estado"""
+    seen = 0.0
+    for path in (_job_path(job_id, 'heartbeat'), _job_path(job_id)):
+        try:
+            seen = max(seen, os.path.getmtime(path))
+        except OSError:
+            pass
+    return seen
+
+
+def get_job(job_id):
+    """Devuelve el estado de un job de entrenamiento o None si no existe.
+
+    Un job encolado o corriendo sin latido reciente (el worker que lo encoló
+    ya no existe) se marca como fallido al leerlo.
+    """
+    if not _valid_job_id(job_id):
+        return None
+    try:
+        with open(_job_path(job_id), encoding='utf-8') as f:
+            job = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if job.get('state') in ('queued', 'running') and time.time() - _last_seen(job_id) > JOB_STALE_SECONDS:
+        job.update(state='failed', finished_at=_now(),
+                   error='El proceso de entrenamiento se detuvo (el servidor se reinició); volvé a intentarlo')
+        _write_job(job)
+    return job
+
+
+@contextmanager
+def _training_slot():
+    """Espera un cupo libre de entrenamiento usando archivos de bloqueo"""
+    if fcntl is None:
+        yield
+        return
+    while True:
+        for i in range(MAX_CONCURRENT_TRAININGS):
+            lock_file = open(os.path.join(JOBS_DIR, f'slot_{i}.lock'), 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+            return
+        time.sleep(SLOT_POLL_SECONDS)
+
+
+def _run_job(job_id):
+    """Ejecuta un job en el proceso de entrenamiento"""
+    job = get_job(job_id)
+    csv_path = job['csv_path']
+    try:
+        with _training_slot():
+            started = time.time()
+            _update_job(job_id, state='running', started_at=_now())
+
+            from ml_service import train_model_report
+            report = train_model_report(csv_path, job['model_path'], mode=job.get('mode'),
+                                        target_p99_ms=job.get('target_p99_ms'),
+                                        max_artifact_bytes=job.get('max_artifact_bytes'))
+
+            _update_job(
+                job_id,
+                state='finished',
+                finished_at=_now(),
+                duration_seconds=round(time.time() - started, 3),
+                metrics=report
+            )
+    except Exception as e:
+        _update_job(job_id, state='failed', finished_at=_now(), error=str(e))
+    finally:
+        if os.path.exists(csv_path):
+            os.remove(csv_path)
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_HEARTBEAT_SECONDS)
+        for job_id in list(_pending_jobs):
+            try:
+                _touch(_job_path(job_id, 'heartbeat'))
+            except OSError:
+                pass
+
+
+def _get_executor():
+    global _executor, _heartbeat_thread
+    with _executor_lock:
+        if _executor is None:
+            # spawn: no heredar hilos ni conexiones del servidor web
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_CONCURRENT_TRAININGS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name='training-heartbeat', daemon=True)
+            _heartbeat_thread.start()
+        return _executor
+
+
+def _on_job_done(job_id, future):
+    """Deja de mantener el latido y marca como fallido un job cuyo proceso murió sin reportar"""
+    _pending_jobs.discard(job_id)
+    try:
+        os.remove(_job_path(job_id, 'heartbeat'))
+    except OSError:
+        pass
+    if future.exception() is None:
+        return
+    job = get_job(job_id)
+    if job and job.get('state') not in ('finished', 'failed'):
+        _update_job(job_id, state='failed', finished_at=_now(), error=str(future.exception()))
+
+
+def submit_training_job(csv_path, model_path=None, owner_id=None, description='', mode=None,
+                        target_p99_ms=None, max_artifact_bytes=None):
+    """Encola un entrenamiento con una copia del CSV (o snapshot .npz) y devuelve el job creado.
+
+    mode: 'batch', 'streaming', 'select' o None para el modo por defecto del modelo.
+    target_p99_ms / max_artifact_bytes: objetivos para elegir el perfil del pipeline.
+    """
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    prune_jobs()
+    job_id = uuid.uuid4().hex
+    # La extensión decide cómo se lee el dataset
+    job_csv = _job_path(job_id, 'npz' if csv_path.endswith('.npz') else 'csv')
+    shutil.copyfile(csv_path, job_csv)
+
+    if model_path is None:
+        model_path = model_registry.DEFAULT_MODEL_PATH
+
+    job = {
+        'id': job_id,
+        'state': 'queued',
+        'description': description,
+        'owner_id': owner_id,
+        'csv_path': job_csv,
+        'model_path': model_path,
+        'mode': mode,
+        'target_p99_ms': target_p99_ms,
+        'max_artifact_bytes': max_artifact_bytes,
+        'owner_pid': os.getpid(),
+        'created_at': _now(),
+        'started_at': None,
+        'finished_at': None,
+        'duration_seconds': None,
+        'metrics': None,
+        'error': None
+    }
+    _write_job(job)
+    _touch(_job_path(job_id, 'heartbeat'))
+
+    executor = _get_executor()
+    _pending_jobs.add(job_id)
+    future = executor.submit(_run_job, job_id)
+    future.add_done_callback(lambda f: _on_job_done(job_id, f))
+    return job
+
+
+def prune_jobs(max_age_days=JOB_RETENTION_DAYS):
+    """Borra los jobs terminados (y sus archivos) más viejos que max_age_days; devuelve cuántos"""
+    if not os.path.isdir(JOBS_DIR):
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for name in os.listdir(JOBS_DIR):
+        job_id, ext = os.path.splitext(name)
+        if ext != '.json' or not _valid_job_id(job_id) or _last_seen(job_id) > cutoff:
+            continue
+        # get_job marca como fallidos los que quedaron colgados
+        job = get_job(job_id)
+        if job is None or job.get('state') not in ('finished', 'failed'):
+            continue
+        for ext in ('json', 'csv', 'npz', 'heartbeat'):
+            try:
+                os.remove(_job_path(job_id, ext))
+            except OSError:
+                pass
+        removed += 1
+    return removed
+
+
+def public_job(job):
+    """Vista del job apta para devolver por la API (sin rutas internas)"""
+    return {k: v for k, v in job.items() if k not in ('csv_path', 'owner_id', 'owner_pid')}